@@ -0,0 +1,89 @@
+# assets.py
+# Startup asset pipeline: a disk cache of pre-scaled images and a background
+# loader for the assets the menu doesn't need.
+#
+# Decoding the 1024x1024 PNGs and smoothscaling them is most of the cold
+# start. load_scaled() keeps the scaled RGBA pixels in .asset_cache/, keyed by
+# file name and target size, and re-scales only when the source file's mtime
+# or size changes. The cached surface is not display-converted (that needs
+# the display and must happen on the main thread).
+
+import os, struct, threading
+import pygame
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+MAGIC = b"SKYA1"
+HEADER = struct.Struct("<5sIIqq")   # magic, w, h, source mtime_ns, source size
+
+_tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+_frombytes = getattr(pygame.image, "frombytes", None) or pygame.image.fromstring
+
+def cache_path(name, size, cache_dir=CACHE_DIR):
+    base = os.path.basename(name).replace(".", "_")
+    return os.path.join(cache_dir, f"{base}_{size[0]}x{size[1]}.rgba")
+
+def load_scaled(name, size, cache_dir=CACHE_DIR):
+    """Surface of image `name` smoothscaled to `size`, via the disk cache."""
+    st = os.stat(name)
+    path = cache_path(name, size, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            magic, w, h, mtime, fsize = HEADER.unpack(f.read(HEADER.size))
+            if magic == MAGIC and (w, h) == tuple(size) and mtime == st.st_mtime_ns and fsize == st.st_size:
+                data = f.read()
+                if len(data) == w * h * 4:
+                    return _frombytes(data, (w, h), "RGBA")
+    except (OSError, struct.error):
+        pass
+    img = pygame.transform.smoothscale(pygame.image.load(name), size)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, size[0], size[1], st.st_mtime_ns, st.st_size))
+            f.write(_tobytes(img, "RGBA"))
+        os.replace(tmp, path)
+    except OSError as e:
+        print("Asset cache write failed:", path, e)
+    return img
+
+class DeferredLoader:
+    """Runs load jobs on a worker thread; the main loop collects results with poll().
+
+    Jobs must not touch the display: return raw surfaces/sounds and let the
+    caller convert them on the main thread when they arrive.
+    """
+    def __init__(self):
+        self.jobs = []
+        self.results = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, name, fn):
+        self.jobs.append((name, fn))
+
+    def start(self, threaded=True):
+        if not threaded:
+            self._run()
+            return
+        self.thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for name, fn in self.jobs:
+            try:
+                value = fn()
+            except Exception as e:
+                print("Deferred load failed:", name, e)
+                value = None
+            with self.lock:
+                self.results.append((name, value))
+
+    def poll(self):
+        """Results finished since the last poll, as [(name, value)]."""
+        with self.lock:
+            done, self.results = self.results, []
+        return done
+
+    def busy(self):
+        return self.thread is not None and (self.thread.is_alive() or bool(self.results))
@@ -0,0 +1,104 @@
+# audio.py
+# Sound effects through a fixed set of reserved mixer channels.
+#
+#   SOUNDS.define("shoot", "SND_SHOOT", max_voices=3, min_interval_ms=45)
+#   SOUNDS.init(8)                        # after pygame.mixer.init(); no-op without a mixer
+#   SOUNDS.set_sound("SND_SHOOT", snd)    # whenever the Sound finishes loading
+#   SOUNDS.play("shoot")
+#
+# A voice is refused when the same effect retriggers within min_interval_ms
+# ("throttled") or already has max_voices playing ("capped"). When every
+# channel is busy it takes the oldest voice of a lower priority ("stolen"),
+# or is dropped. Several effects may share one Sound (e.g. kill and boss
+# kill explosions) with different limits and priorities.
+
+import pygame
+
+class _Effect:
+    __slots__ = ("name", "source", "sound", "max_voices", "min_interval_ms", "priority",
+                 "volume", "last_ms")
+
+    def __init__(self, name, source, max_voices, min_interval_ms, priority, volume):
+        self.name = name
+        self.source = source
+        self.sound = None
+        self.max_voices = max_voices
+        self.min_interval_ms = min_interval_ms
+        self.priority = priority
+        self.volume = volume
+        self.last_ms = -10**9
+
+class SoundManager:
+    def __init__(self):
+        self.effects = {}
+        self.channels = []        # reserved pygame.mixer.Channel objects; empty = no mixer
+        self.voices = []          # per channel: (effect, start_ms) of the last voice started on it
+        self.counts = dict.fromkeys(("played", "throttled", "capped", "stolen", "dropped"), 0)
+
+    def define(self, name, source, max_voices=2, min_interval_ms=0, priority=0, volume=1.0):
+        self.effects[name] = _Effect(name, source, max_voices, min_interval_ms, priority, volume)
+
+    def set_sound(self, source, sound):
+        for e in self.effects.values():
+            if e.source == source:
+                e.sound = sound
+
+    def init(self, channels=8):
+        """Reserve `channels` mixer channels; leaves the manager silent if there is no mixer."""
+        try:
+            if not pygame.mixer.get_init():
+                return False
+            if pygame.mixer.get_num_channels() < channels:
+                pygame.mixer.set_num_channels(channels)
+            pygame.mixer.set_reserved(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            self.voices = [None] * channels
+            return True
+        except pygame.error as e:
+            print("Mixer channels unavailable:", e)
+            self.channels = []
+            return False
+
+    def play(self, name, now_ms=None):
+        e = self.effects.get(name)
+        if e is None or e.sound is None or not self.channels:
+            return False
+        now = pygame.time.get_ticks() if now_ms is None else now_ms
+        counts = self.counts
+        if now - e.last_ms < e.min_interval_ms:
+            counts["throttled"] += 1
+            return False
+        free = None
+        same = 0
+        victim = None
+        for i, ch in enumerate(self.channels):
+            if not ch.get_busy():
+                if free is None:
+                    free = i
+                continue
+            effect, start = self.voices[i]
+            if effect is e:
+                same += 1
+            if effect.priority < e.priority and (victim is None or start < self.voices[victim][1]):
+                victim = i
+        if same >= e.max_voices:
+            counts["capped"] += 1
+            return False
+        if free is None:
+            if victim is None:
+                counts["dropped"] += 1
+                return False
+            self.channels[victim].stop()
+            counts["stolen"] += 1
+            free = victim
+        ch = self.channels[free]
+        ch.set_volume(e.volume)
+        ch.play(e.sound)
+        self.voices[free] = (e, now)
+        e.last_ms = now
+        counts["played"] += 1
+        return True
+
+    def stats(self):
+        active = sum(1 for ch in self.channels if ch.get_busy())
+        return dict(self.counts, active=active, channels=len(self.channels))
@@ -0,0 +1,144 @@
+# backend.py
+# Optional SDL2 Renderer/Texture backend.
+#
+# Everything that draws a frame (Game.draw, the render queue, the menu and
+# gameover screens) only uses this part of the Surface API on its target:
+#   fill(color, rect=None)  blit(src, dest, area=None)  blits(pairs, doreturn=True)
+#   get_size()  get_width()  get_height()  get_rect()  copy()
+# so the default backend is just the screen Surface. TextureTarget implements
+# the same calls on a pygame._sdl2 Renderer: each source Surface is uploaded
+# once as a Texture (kept for as long as the Surface lives) and drawn by the
+# GPU, or by SDL's software renderer (software=True, and always headless).
+#
+# Sprites, cached text and background tiles never change after they're built,
+# so they upload once. A Surface that is redrawn in place must be passed to
+# changed() before its next blit (the profiler overlay scratch surface).
+
+import weakref
+import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
+
+class TextureTarget:
+    def __init__(self, renderer, size):
+        self.renderer = renderer
+        self.size = tuple(size)
+        self._textures = {}   # id(surface) -> (weakref to it, Texture)
+        self.uploads = 0
+        self.draws = 0
+        self.set_logical_size(size)
+
+    def set_logical_size(self, size):
+        """Draw in `size` coordinates; the renderer scales them to the window."""
+        self.size = tuple(size)
+        self.renderer.logical_size = self.size
+
+    def texture(self, surf):
+        key = id(surf)
+        entry = self._textures.get(key)
+        if entry is not None and entry[0]() is surf:
+            return entry[1]
+        tex = Texture.from_surface(self.renderer, surf)
+        self._textures[key] = (weakref.ref(surf, lambda _, key=key, tex=tex: self._drop(key, tex)), tex)
+        self.uploads += 1
+        return tex
+
+    def _drop(self, key, tex):
+        entry = self._textures.get(key)
+        if entry is not None and entry[1] is tex:
+            del self._textures[key]
+
+    def changed(self, surf):
+        self._textures.pop(id(surf), None)
+
+    def blit(self, src, dest, area=None):
+        tex = self.texture(src)
+        x, y = dest[0], dest[1]
+        self.draws += 1
+        if area is None:
+            tex.draw(dstrect=(x, y))
+            return pygame.Rect(x, y, tex.width, tex.height)
+        area = pygame.Rect(area)
+        r = pygame.Rect(x, y, area.w, area.h)
+        tex.draw(srcrect=area, dstrect=r)
+        return r
+
+    def blits(self, pairs, doreturn=True):
+        texture = self.texture
+        rects = [] if doreturn else None
+        n = 0
+        for src, dest in pairs:
+            tex = texture(src)
+            tex.draw(dstrect=(dest[0], dest[1]))
+            n += 1
+            if doreturn:
+                rects.append(pygame.Rect(dest[0], dest[1], tex.width, tex.height))
+        self.draws += n
+        return rects
+
+    def fill(self, color, rect=None):
+        r = self.renderer
+        r.draw_color = tuple(color)[:3] + (255,)
+        if rect is None:
+            r.clear()
+            return self.get_rect()
+        r.fill_rect(rect)
+        return pygame.Rect(rect)
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self, **kw):
+        r = pygame.Rect((0, 0), self.size)
+        for name, value in kw.items():
+            setattr(r, name, value)
+        return r
+
+    def copy(self):
+        """Read the frame back into a Surface (slow: for one-off snapshots)."""
+        surf = self.read()
+        if surf.get_size() != self.size:
+            surf = pygame.transform.smoothscale(surf, self.size)
+        return surf
+
+    def output_size(self):
+        """Pixel size of the window being drawn to (what read() returns)."""
+        r = self.renderer
+        r.logical_size = (0, 0)
+        size = r.get_viewport().size
+        r.logical_size = self.size
+        return size
+
+    def read(self, surf=None):
+        """The frame drawn so far at the output resolution, into `surf` if given
+        (which must be at least that big). Logical scaling is switched off for
+        the read: with it on, SDL reads the whole output into a buffer sized
+        for the logical viewport and overruns it."""
+        r = self.renderer
+        r.logical_size = (0, 0)
+        try:
+            return r.to_surface(surface=surf)
+        finally:
+            r.logical_size = self.size
+
+    def present(self):
+        self.renderer.present()
+
+    def stats(self):
+        return {"textures": len(self._textures), "uploads": self.uploads, "draws": self.draws}
+
+def open_window(title, size, fullscreen=False, software=False, vsync=False):
+    """Window + Renderer and a TextureTarget drawing into it (after pygame.init()).
+
+    A hidden 1x1 display mode is kept alongside, so Surface.convert() and
+    convert_alpha() still have a pixel format to convert to.
+    """
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    window = Window(title, size=size, fullscreen=fullscreen)
+    renderer = Renderer(window, accelerated=0 if software else -1, vsync=vsync and not software)
+    return window, TextureTarget(renderer, size)
@@ -0,0 +1,206 @@
+# balance.py
+# Monte-Carlo difficulty balancing: thousands of headless games per difficulty,
+# played by a scripted autopilot over every core, summarized into a report.
+#
+#   python balance.py                                  # 1000 games each of Easy/Normal/Hard
+#   python balance.py --games 4000 --workers 8 --json balance.json
+#   python balance.py --difficulties Hard --max-minutes 5 --no-buy
+#
+# Game i of every difficulty uses seed base_seed + i for both the game and the
+# autopilot, so the difficulties are compared on the same random streams and a
+# sweep is reproducible. Games that reach --max-minutes are cut off and count
+# as survivors past that point.
+#
+# Report per difficulty: survival time (mean and percentiles, plus the fraction
+# of games still alive every --curve-step seconds), points earned (kills, not
+# net of upgrade spending), and per upgrade the share of games that bought it,
+# the median time of the 1st/2nd/3rd purchase and the mean final level.
+
+import argparse, json, os, random, time
+import multiprocessing as mp
+import numpy as np
+
+DIFFICULTIES = ("Easy", "Normal", "Hard")
+UPGRADES = ("power", "firerate", "hp")
+NTH = 3          # purchase times reported per upgrade
+
+class Autopilot:
+    """Scripted player: keeps the trigger held and steers under the nearest
+    (lowest) enemy, re-aiming every `reaction` ticks with a gaussian aim error
+    of `aim_error` enemy widths; buys the cheapest upgrade it can afford."""
+    def __init__(self, sky, seed=None, reaction=6, aim_error=0.2, buy=True):
+        self.sky = sky
+        self.rng = random.Random(seed)
+        self.reaction = reaction
+        self.aim_error = aim_error
+        self.buy = buy
+        self.tick = 0
+        self.target = sky.WIDTH // 2
+
+    def __call__(self, g):
+        sky = self.sky
+        if self.tick % self.reaction == 0:
+            en = g.enemies
+            n = len(en)
+            if n:
+                i = int(en.y[:n].argmax())
+                self.target = int(en.x[i] + self.rng.gauss(0.0, self.aim_error) * en.size[i])
+            else:
+                self.target = sky.WIDTH // 2
+        self.tick += 1
+        purchases = ()
+        if self.buy:
+            key = min(UPGRADES, key=lambda k: g.upgrades[k]["cost"])
+            if g.score >= g.upgrades[key]["cost"]:
+                purchases = (key,)
+        return sky.FrameInput((self.target, sky.PLAY_H - 150), True, purchases)
+
+def play(sky, difficulty, seed, max_minutes=10.0, buy=True):
+    """One game to the end (or max_minutes): survival, points and purchase times."""
+    max_ticks = int(max_minutes * 60 * sky.SIM_HZ)
+    g = sky.Game(sky.TickClock(), seed=seed)
+    g.save_scores = False
+    g.set_difficulty(difficulty, seed=seed)
+    pilot = Autopilot(sky, seed, buy=buy)
+    bought = {k: [] for k in UPGRADES}
+    spent = 0
+    ticks = 0
+    while g.state == "playing" and ticks < max_ticks:
+        inputs = pilot(g)
+        costs = {k: g.upgrades[k]["cost"] for k in inputs.purchases}
+        g.step(inputs)
+        ticks += 1
+        for k, cost in costs.items():
+            if g.upgrades[k]["level"] > len(bought[k]):
+                bought[k].append(ticks * sky.SIM_STEP_MS / 1000.0)
+                spent += cost
+    return {"difficulty": difficulty, "seed": seed,
+            "survival_s": round(ticks * sky.SIM_STEP_MS / 1000.0, 3),
+            "truncated": g.state == "playing",
+            "points": g.score + spent,
+            "purchases": bought}
+
+# ---------------- workers ----------------
+_SKY = None
+
+def _init_worker(size):
+    global _SKY
+    from headless import load_game
+    _SKY = load_game(size)
+
+def _run_chunk(task):
+    difficulty, seeds, max_minutes, buy = task
+    return [play(_SKY, difficulty, s, max_minutes, buy) for s in seeds]
+
+def run(difficulties, games, base_seed=0, workers=None, size=(480, 800), max_minutes=10.0, buy=True,
+        chunk=8, progress=None):
+    """Play `games` games per difficulty over `workers` processes; returns the per-game rows."""
+    tasks = [(d, list(range(base_seed + lo, base_seed + min(games, lo + chunk))), max_minutes, buy)
+             for d in difficulties for lo in range(0, games, chunk)]
+    rows = []
+    total = games * len(difficulties)
+    workers = max(1, workers or os.cpu_count() or 1)
+    pool = mp.get_context().Pool(workers, initializer=_init_worker, initargs=(size,))
+    try:
+        for part in pool.imap_unordered(_run_chunk, tasks):
+            rows.extend(part)
+            if progress:
+                progress(len(rows), total)
+        pool.close()       # let the workers exit on their own; terminate() can hang on SDL's threads
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    rows.sort(key=lambda r: (difficulties.index(r["difficulty"]), r["seed"]))
+    return rows
+
+# ---------------- report ----------------
+def summarize(rows, curve_step=15.0, max_minutes=10.0):
+    """Aggregate per-game rows into one dict per difficulty."""
+    out = {}
+    for d in dict.fromkeys(r["difficulty"] for r in rows):
+        rs = [r for r in rows if r["difficulty"] == d]
+        surv = np.array([r["survival_s"] for r in rs])
+        pts = np.array([r["points"] for r in rs])
+        grid = np.arange(0.0, max_minutes * 60 + 1e-9, curve_step)
+        alive = [(float(t), round(float((surv >= t).mean()), 4)) for t in grid]
+        upgrades = {}
+        for k in UPGRADES:
+            times = [r["purchases"][k] for r in rs]
+            upgrades[k] = {
+                "bought_share": round(float(np.mean([bool(t) for t in times])), 4),
+                "mean_level": round(float(np.mean([len(t) for t in times])), 3),
+                "median_nth_s": [round(float(np.median(nth)), 1) if nth else None
+                                 for nth in ([t[j] for t in times if len(t) > j] for j in range(NTH))],
+            }
+        out[d] = {
+            "games": len(rs),
+            "truncated": int(sum(r["truncated"] for r in rs)),
+            "survival_s": _dist(surv),
+            "points": _dist(pts),
+            "alive": alive,
+            "upgrades": upgrades,
+        }
+    return out
+
+def _dist(a):
+    p10, p50, p90 = np.percentile(a, (10, 50, 90))
+    return {"mean": round(float(a.mean()), 2), "p10": round(float(p10), 2), "p50": round(float(p50), 2),
+            "p90": round(float(p90), 2), "max": round(float(a.max()), 2)}
+
+def report(summary, curve_every=4):
+    lines = []
+    names = list(summary)
+    lines.append(f"{'':<26}" + "".join(f"{d:>12}" for d in names))
+    def row(label, fn):
+        lines.append(f"{label:<26}" + "".join(f"{fn(summary[d]):>12}" for d in names))
+    row("games (cut off)", lambda s: f"{s['games']} ({s['truncated']})")
+    for key, label in (("survival_s", "survival s"), ("points", "points")):
+        for stat in ("mean", "p10", "p50", "p90"):
+            row(f"{label} {stat}", lambda s, key=key, stat=stat: f"{s[key][stat]:.1f}")
+    lines.append("alive at")
+    curve = summary[names[0]]["alive"]
+    for j in range(curve_every, len(curve), curve_every):
+        t = curve[j][0]
+        row(f"  {int(t)//60}:{int(t)%60:02d}", lambda s, j=j: f"{s['alive'][j][1]:.1%}")
+    for k in UPGRADES:
+        lines.append(f"upgrade {k}")
+        row("  bought / mean level", lambda s, k=k: f"{s['upgrades'][k]['bought_share']:.0%} / "
+                                                  f"{s['upgrades'][k]['mean_level']:.1f}")
+        for j in range(NTH):
+            row(f"  median #{j+1} at s", lambda s, k=k, j=j: "-" if s["upgrades"][k]["median_nth_s"][j] is None
+                else f"{s['upgrades'][k]['median_nth_s'][j]:.1f}")
+    return "\n".join(lines)
+
+def main():
+    ap = argparse.ArgumentParser(description="Monte-Carlo difficulty balancing with a scripted autopilot")
+    ap.add_argument("--games", type=int, default=1000, help="games per difficulty (default: 1000)")
+    ap.add_argument("--difficulties", default=",".join(DIFFICULTIES))
+    ap.add_argument("--workers", type=int, default=0, help="default: one per CPU")
+    ap.add_argument("--seed", type=int, default=0, help="seed of game 0; game i uses seed+i")
+    ap.add_argument("--max-minutes", type=float, default=10.0, help="cut games off after this long (default: 10)")
+    ap.add_argument("--curve-step", type=float, default=15.0, help="seconds between survival curve points")
+    ap.add_argument("--no-buy", action="store_true", help="autopilot never buys upgrades")
+    ap.add_argument("--size", default="480x800")
+    ap.add_argument("--json", help="write the summary and per-game rows to this file")
+    args = ap.parse_args()
+
+    difficulties = args.difficulties.split(",")
+    size = tuple(int(v) for v in args.size.split("x"))
+    t = time.perf_counter()
+    def progress(done, total):
+        print(f"\r{done}/{total} games  {time.perf_counter() - t:.0f} s", end="", flush=True)
+    rows = run(difficulties, args.games, args.seed, args.workers or None, size, args.max_minutes,
+               not args.no_buy, progress=progress)
+    secs = time.perf_counter() - t
+    print(f"\r{len(rows)} games in {secs:.1f} s ({len(rows) / secs:.1f} games/s)")
+    summary = summarize(rows, args.curve_step, args.max_minutes)
+    print(report(summary))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary, "games": rows}, f)
+        print("written to", args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench_alloc.py
+# Allocation / GC pressure of a busy headless game, with and without pools.
+# (Enemies live in EnemyManager's arrays, so only bullets/powerups are pooled.)
+#
+#   python bench_alloc.py [--ticks 6000] [--seed 1]
+#
+# The player is made effectively immortal and gets max fire-rate so the
+# bullet/enemy/powerup churn is as high as a long Hard run.
+
+import argparse, gc, random, time
+from headless import load_game
+
+def run(sky, ticks, seed, pooling):
+    sky.POOLING = pooling
+    random.seed(seed)
+    g = sky.Game(sky.TickClock(), seed=seed)
+    g.save_scores = False
+    g.set_difficulty("Hard")
+    g.player.hp = 10**6
+    g.player.shot_cool = 90
+    g.player.temp_multi_until = 10**9   # triple shot all run
+
+    collections = [0, 0, 0]
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[info["generation"]] += 1
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    t = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            tx = int(g.enemies.x[0]) if len(g.enemies) else sky.WIDTH / 2
+            g.step(sky.FrameInput((tx, sky.PLAY_H - 150), True))
+            if g.state != "playing":
+                g.set_difficulty("Hard")
+                g.player.hp = 10**6
+    finally:
+        gc.callbacks.remove(on_gc)
+    ms = (time.perf_counter() - t) * 1000.0 / ticks
+    pools = {name: getattr(g, name).stats() for name in ("bullet_pool", "powerup_pool")}
+    return ms, collections, pools
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=6000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    sky = load_game((480, 800))
+    for pooling in (False, True):
+        ms, coll, pools = run(sky, args.ticks, args.seed, pooling)
+        per_k = [c * 1000.0 / args.ticks for c in coll]
+        print(f"pooling={'on ' if pooling else 'off'}  {ms:.3f} ms/tick  "
+              f"gc per 1000 ticks: gen0={per_k[0]:.1f} gen1={per_k[1]:.1f} gen2={per_k[2]:.2f}")
+        for name, st in pools.items():
+            print(f"    {name:<13} created={st['created']:<6} reused={st['reused']:<6} free={st['free']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# bench_backends.py
+# Side-by-side benchmark of the two render backends: software Surface blits
+# (default) and the SDL2 Renderer/Texture backend (backend.py).
+#
+#   python bench_backends.py                                  # all scenarios, 480x800 + 1440x3200
+#   python bench_backends.py --scenarios boss_wave --sizes 1080x2400 --frames 600
+#   python bench_backends.py --accelerated                    # GPU renderer (needs a real display)
+#
+# Runs the bench_stress scenarios; per frame it times Game.draw and the present
+# (display flip / Renderer.present) separately. Each backend runs in its own
+# process because setup() opens the display for the whole module. Headless the
+# SDL2 backend uses SDL's software renderer, so this measures call overhead
+# and software fill rate; on a phone the textures are drawn by the GPU.
+
+import argparse, random, time
+import multiprocessing as mp
+import numpy as np
+
+BACKENDS = ("surface", "sdl2")
+
+def measure(backend, sizes, scenarios, frames, seed, accelerated=False):
+    """{scenario@size: {"draw_ms", "draw_p95_ms", "present_ms"}} for one backend."""
+    import bench_stress as bs
+    from headless import import_game
+    sky = import_game()
+    results = {}
+    for w, h in sizes:
+        sky.setup(headless=not accelerated, size=(w, h), backend=backend)
+        for name in scenarios:
+            _, setup, tick = bs.SCENARIOS[name]
+            n = frames or bs.SCENARIOS[name][0]
+            random.seed(seed)
+            g = sky.Game(sky.TickClock(), seed=seed)
+            g.save_scores = False
+            setup(sky, g)
+            drw = np.zeros(n); pres = np.zeros(n)
+            pc = time.perf_counter
+            for t in range(n):
+                tick(sky, g, t)
+                g.step(bs.autopilot(sky, g))
+                t0 = pc()
+                g.draw(sky.screen)
+                t1 = pc()
+                sky.present_screen()
+                drw[t] = t1 - t0; pres[t] = pc() - t1
+            drw *= 1000.0; pres *= 1000.0
+            results[f"{name}@{w}x{h}"] = {
+                "draw_ms": round(float(drw.mean()), 4),
+                "draw_p95_ms": round(float(np.percentile(drw, 95)), 4),
+                "present_ms": round(float(pres.mean()), 4),
+            }
+    return results
+
+def main():
+    import bench_stress as bs
+    ap = argparse.ArgumentParser(description="Surface vs SDL2 Renderer backend benchmark")
+    ap.add_argument("--scenarios", default=",".join(bs.SCENARIOS))
+    ap.add_argument("--sizes", default="480x800,1440x3200")
+    ap.add_argument("--frames", type=int, default=600, help="frames per scenario, 0 = the scenario's own length")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--accelerated", action="store_true",
+                    help="open real windows and let SDL pick a GPU renderer (not headless)")
+    args = ap.parse_args()
+    sizes = [tuple(int(v) for v in s.split("x")) for s in args.sizes.split(",")]
+    scenarios = args.scenarios.split(",")
+
+    ctx = mp.get_context("spawn")
+    results = {}
+    for backend in BACKENDS:
+        pool = ctx.Pool(1)
+        try:
+            results[backend] = pool.apply(measure, (backend, sizes, scenarios, args.frames, args.seed,
+                                                    args.accelerated))
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    print(f"{'scenario':<24}{'surface draw':>13}{'present':>9}{'sdl2 draw':>11}{'present':>9}"
+          f"{'total x':>9}")
+    for key, s in results["surface"].items():
+        t = results["sdl2"][key]
+        a = s["draw_ms"] + s["present_ms"]; b = t["draw_ms"] + t["present_ms"]
+        print(f"{key:<24}{s['draw_ms']:>13.3f}{s['present_ms']:>9.3f}{t['draw_ms']:>11.3f}{t['present_ms']:>9.3f}"
+              f"{a / b if b else 0.0:>9.2f}")
+    print("total x = surface (draw + present) / sdl2 (draw + present); > 1 means sdl2 is faster")
+
+if __name__ == "__main__":
+    main()
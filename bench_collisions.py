@@ -0,0 +1,68 @@
+# bench_collisions.py
+# Broad phase benchmark: old nested Rect loop vs SpatialHash, headless.
+#
+#   python bench_collisions.py [--ticks 200] [--counts 50,100,200,400,800]
+#
+# Enemies (at random depths) and bullets are spread over the play field the
+# way they are in a busy Hard wave; both methods must report the same hits.
+
+import argparse, random, time
+import pygame
+from headless import load_game
+from spatial_hash import SpatialHash
+
+def make_scene(sky, n_enemies, n_bullets, seed=1):
+    random.seed(seed)
+    mgr = sky.EnemyManager(sky.TickClock(), random.Random(seed))
+    for i in range(n_enemies):
+        j = mgr.spawn(level=1 + i % 8)
+        mgr.z[j] = random.uniform(80, mgr.base_z[j])
+    mgr.project()
+    enemies = list(mgr.boxes())
+    bullets = [sky.Bullet(random.uniform(0, sky.WIDTH), random.uniform(0, sky.PLAY_H), -14, 1)
+               for _ in range(n_bullets)]
+    return enemies, bullets
+
+def naive(enemies, bullets):
+    hits = 0
+    for b in bullets:
+        br = b.rect()
+        for l,t,r,bt in enemies:
+            if br.colliderect(pygame.Rect(l, t, r - l, bt - t)):
+                hits += 1
+                break
+    return hits
+
+def hashed(enemies, bullets, grid):
+    grid.clear()
+    for i,box in enumerate(enemies):
+        grid.insert(i, *box)
+    hits = 0
+    for b in bullets:
+        if grid.hits(*b.bounds()):
+            hits += 1
+    return hits
+
+def timeit(fn, ticks):
+    t = time.perf_counter()
+    for _ in range(ticks):
+        r = fn()
+    return (time.perf_counter() - t) * 1000.0 / ticks, r
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ticks", type=int, default=200)
+    ap.add_argument("--counts", default="50,100,200,400,800")
+    args = ap.parse_args()
+    sky = load_game((480, 800))
+    grid = SpatialHash(int(64*(sky.WIDTH/480)))
+    print(f"{'enemies':>8} {'bullets':>8} {'naive ms':>10} {'grid ms':>10} {'speedup':>8}")
+    for n in [int(c) for c in args.counts.split(",")]:
+        enemies, bullets = make_scene(sky, n, n)
+        ms_a, ha = timeit(lambda: naive(enemies, bullets), args.ticks)
+        ms_b, hb = timeit(lambda: hashed(enemies, bullets, grid), args.ticks)
+        assert ha == hb, (ha, hb)
+        print(f"{n:>8} {n:>8} {ms_a:>10.3f} {ms_b:>10.3f} {ms_a/ms_b:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# bench_stress.py
+# Headless stress benchmarks: scripted scenarios against Game on SDL's dummy
+# video driver, at phone resolutions, compared against a stored baseline.
+#
+#   python bench_stress.py                                 # all scenarios, 480x800 + 1440x3200
+#   python bench_stress.py --scenarios storm,boss_wave --sizes 480x800
+#   python bench_stress.py --frames 600 --save-baseline bench_baseline.json
+#   python bench_stress.py --frames 600 --baseline bench_baseline.json --threshold 0.15
+#   python bench_stress.py --fixture crowd.skysnap --sizes 480x800   # + a run from a snapshot.py fixture
+#
+# Update and draw are timed separately per frame (draw = Game.draw into the
+# off-screen display surface). A second, shorter pass under tracemalloc gives
+# peak Python memory and the bytes allocated per frame (how far the traced
+# memory rises above the frame's starting point); GC collections are counted
+# during the timed pass.
+# Exit status is 1 when any scenario is slower than baseline*(1+threshold).
+
+import argparse, gc, json, random, sys, time, tracemalloc
+import numpy as np
+from headless import load_game
+import snapshot
+
+def autopilot(sky, g):
+    """Steer under the lowest enemy and keep shooting."""
+    en = g.enemies
+    n = len(en)
+    tx = int(en.x[int(en.y[:n].argmax())]) if n else sky.WIDTH // 2
+    return sky.FrameInput((tx, sky.PLAY_H - 150), True)
+
+def keep_alive(g):
+    g.player.hp = 10**6
+
+def restart(g, difficulty="Hard"):
+    g.set_difficulty(difficulty)
+    keep_alive(g)
+
+def fill_enemies(sky, g, count, kind="normal", speed=0.05):
+    """Top the wave up to `count`, spread over depth, crawling so none pass."""
+    en = g.enemies
+    while len(en) < count:
+        i = en.spawn(1 + len(en) % 8, kind, g.enemy_hp_mul, g.enemy_speed_mul)
+        en.z[i] = random.uniform(120, en.base_z[i])
+        en.speed[i] = speed
+    en.project()
+    o = en.order
+    en.order = o[np.argsort(-en.z[o], kind="stable")]
+
+# ---------------- scenarios: (frames at 60 fps, setup(sky, g), per-frame hook) ----------------
+def hard_setup(sky, g):
+    restart(g)
+    g.score = 10**6
+    while g.player.shot_cool > 90:        # max fire-rate upgrades
+        g.purchase("firerate")
+    g.score = 0
+
+def hard_tick(sky, g, t):
+    if g.state != "playing":
+        hard_setup(sky, g)
+
+def enemies_tick(sky, g, t):
+    if g.state != "playing":
+        restart(g)
+    fill_enemies(sky, g, 500)
+
+def storm_setup(sky, g):
+    restart(g)
+    g.particles = sky.ParticleBuffer(capacity=8192, scale=sky.WIDTH/480)
+
+def storm_tick(sky, g, t):
+    if g.state != "playing":
+        storm_setup(sky, g)
+    # keep ~5000 live sparks: lives are 12..26 ticks, so refill each tick
+    p = g.particles
+    while len(p) < 5000:
+        p.emit(random.uniform(0, sky.WIDTH), random.uniform(0, sky.PLAY_H), sky.YELLOW, 40, 30, 30)
+
+def boss_setup(sky, g):
+    restart(g)
+    g.player.temp_multi_until = 10**12
+
+def boss_tick(sky, g, t):
+    if g.state != "playing":
+        boss_setup(sky, g)
+    fill_enemies(sky, g, 12, kind="boss", speed=0.4)
+
+SCENARIOS = {
+    "hard_10min":  (36000, hard_setup, hard_tick),
+    "enemies_500": (1800, lambda sky, g: restart(g), enemies_tick),
+    "storm":       (1800, storm_setup, storm_tick),
+    "boss_wave":   (1800, boss_setup, boss_tick),
+}
+
+def fixture_scenario(path, frames=1800):
+    """Scenario starting (and restarting) from a snapshot, e.g. one written by
+    `python snapshot.py fixture`; it only runs at the size it was saved at."""
+    data = snapshot.read(path)
+    def setup(sky, g):
+        snapshot.load_into(g, data, sky.WIDTH, sky.HEIGHT)
+        keep_alive(g)
+    def tick(sky, g, t):
+        if g.state != "playing":
+            setup(sky, g)
+    hd = snapshot.header(data)
+    return (frames, setup, tick), (hd["width"], hd["height"])
+
+def run(sky, name, frames, seed, trace=False):
+    _, setup, tick = SCENARIOS[name]
+    random.seed(seed)
+    g = sky.Game(sky.TickClock(), seed=seed)
+    g.save_scores = False
+    setup(sky, g)
+    screen = sky.screen
+    upd = np.zeros(frames); drw = np.zeros(frames)
+    collections = [0]
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    gc.callbacks.append(on_gc)
+    alloc = np.zeros(frames if trace else 0)
+    peak = 0
+    pc = time.perf_counter
+    try:
+        for t in range(frames):
+            tick(sky, g, t)
+            if trace:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+            t0 = pc()
+            g.step(autopilot(sky, g))
+            t1 = pc()
+            g.draw(screen)
+            upd[t] = t1 - t0; drw[t] = pc() - t1
+            if trace:
+                top = tracemalloc.get_traced_memory()[1]
+                alloc[t] = top - base
+                peak = max(peak, top)
+    finally:
+        gc.callbacks.remove(on_gc)
+        if trace:
+            tracemalloc.stop()
+    return upd * 1000.0, drw * 1000.0, collections[0], peak, alloc / 1024.0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--sizes", default="480x800,1440x3200")
+    ap.add_argument("--frames", type=int, default=0, help="override every scenario's length")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--baseline", help="JSON file to compare against")
+    ap.add_argument("--save-baseline", help="write results to this JSON file")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown vs baseline (0.15 = 15%%)")
+    ap.add_argument("--fixture", help="also run a 'fixture' scenario starting from this snapshot")
+    args = ap.parse_args()
+    scenarios = args.scenarios.split(",")
+    fixture_size = None
+    if args.fixture:
+        SCENARIOS["fixture"], fixture_size = fixture_scenario(args.fixture)
+        if "fixture" not in scenarios:
+            scenarios.append("fixture")
+
+    results = {}
+    print(f"{'scenario':<14}{'size':>11}{'frames':>8}{'upd ms':>9}{'upd p95':>9}{'draw ms':>9}"
+          f"{'draw p95':>10}{'gc':>6}{'peak MB':>9}{'alloc KB':>10}{'p95':>8}")
+    for size in args.sizes.split(","):
+        w, h = (int(v) for v in size.split("x"))
+        sky = load_game((w, h))
+        for name in scenarios:
+            if name == "fixture" and (w, h) != fixture_size:
+                continue
+            frames = args.frames or SCENARIOS[name][0]
+            upd, drw, gcs, _, _ = run(sky, name, frames, args.seed)
+            _, _, _, peak, alloc = run(sky, name, min(frames, 600), args.seed, trace=True)
+            key = f"{name}@{size}"
+            results[key] = {
+                "frames": frames,
+                "update_ms": round(float(upd.mean()), 4), "update_p95_ms": round(float(np.percentile(upd, 95)), 4),
+                "draw_ms": round(float(drw.mean()), 4), "draw_p95_ms": round(float(np.percentile(drw, 95)), 4),
+                "gc_collections": gcs, "peak_mb": round(peak / 2**20, 2),
+                "alloc_kb": round(float(alloc.mean()), 2), "alloc_p95_kb": round(float(np.percentile(alloc, 95)), 2),
+            }
+            r = results[key]
+            print(f"{name:<14}{size:>11}{frames:>8}{r['update_ms']:>9.3f}{r['update_p95_ms']:>9.3f}"
+                  f"{r['draw_ms']:>9.3f}{r['draw_p95_ms']:>10.3f}{gcs:>6}{r['peak_mb']:>9.2f}"
+                  f"{r['alloc_kb']:>10.1f}{r['alloc_p95_kb']:>8.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("baseline written to", args.save_baseline)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        failed = []
+        for key, r in results.items():
+            b = base.get(key)
+            if not b:
+                continue
+            for metric in ("update_ms", "draw_ms"):
+                if b[metric] > 0 and r[metric] > b[metric] * (1 + args.threshold):
+                    failed.append(f"{key} {metric}: {r[metric]:.3f} vs baseline {b[metric]:.3f} "
+                                  f"(+{(r[metric]/b[metric] - 1)*100:.0f}%)")
+        if failed:
+            print("REGRESSIONS:")
+            for line in failed:
+                print("  " + line)
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# capture.py
+# In-game capture of gameplay frames, for bug reports and perf triage.
+#
+#   python "python space_2_5d_mobile.py" --capture captures/                      # PNG sequence
+#   python "python space_2_5d_mobile.py" --capture captures/ --capture-format raw  # one raw file
+#   python capture.py info captures/capture-20261016-201500.skyframes
+#   python capture.py png captures/capture-20261016-201500.skyframes out/          # raw -> PNGs
+#
+# grab() runs on the frame thread once the frame is complete: it copies the
+# frame into a free buffer from a small ring (one blit, no allocation) and
+# queues the buffer's slot number for the writer, which writes it and hands the
+# slot back. When no slot is free the frame is dropped instead of waiting, so a
+# slow disk or PNG encoder costs frames in the capture, never frame time in the
+# game. Frame numbers count dropped frames too, so the gaps show.
+#
+# The ring lives in shared memory. Raw frames are written by a thread (write()
+# releases the GIL); PNGs are encoded in a separate process, because
+# pygame.image.save holds the GIL for the whole encode (~18 ms at 480x800).
+#
+# Raw file layout (little endian):
+#   header  "SKYF" u16 version, u16 width, u16 height, u16 pitch (bytes per row),
+#           u32 red, green, blue masks (32-bit pixels)
+#   frames  u32 frame number, f64 ms since the capture started, then height*pitch pixel bytes
+
+import argparse, os, queue, struct, threading, time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import pygame
+
+MAGIC = b"SKYF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHH3I")
+FRAME = struct.Struct("<Id")
+FORMATS = ("png", "raw")
+PIXELS = "BGRA"       # ring buffer layout: 32-bit 0xAARRGGBB little endian
+MASKS = (0xFF0000, 0xFF00, 0xFF)
+
+class FrameCapture:
+    def __init__(self, directory, fmt="png", buffers=6):
+        if fmt not in FORMATS:
+            raise ValueError(f"capture format must be one of {FORMATS}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fmt = fmt
+        self.nbuffers = buffers
+        self.size = None
+        self.path = None            # PNG directory or raw file of the current segment
+        self.shm = []
+        self.buffers = []           # Surfaces over the shared memory blocks
+        self.free = []              # slots the writer has handed back
+        self.jobs = self.done = None
+        self.writer = None
+        self.stopped = False        # the writer died: capture is off
+        self.t0 = None
+        self.frames = 0             # grab() calls, dropped ones included
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.grab_ms = 0.0          # total and worst time spent in grab()
+        self.grab_max_ms = 0.0
+
+    def grab(self, surf):
+        """Queue the frame in `surf` (a Surface, or a backend.TextureTarget) for writing."""
+        if self.stopped:
+            return
+        t0 = time.perf_counter()
+        if self.t0 is None:
+            self.t0 = t0
+        target = surf if isinstance(surf, pygame.Surface) else None
+        size = surf.get_size() if target is not None else surf.output_size()
+        if size != self.size:
+            self._start(size)
+        self._reclaim()
+        if not self.writer.is_alive():
+            print(f"Capture writer stopped unexpectedly; capture is off ({self.written} frames written)")
+            self.stopped = True
+            self._finish()
+            return
+        n = self.frames
+        self.frames += 1
+        if not self.free:
+            self.dropped += 1       # the writer is behind
+        else:
+            i = self.free.pop()
+            if target is not None:
+                self.buffers[i].blit(target, (0, 0))
+            else:
+                surf.read(self.buffers[i])
+            self.jobs.put((i, n, (t0 - self.t0) * 1000.0))
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.grab_ms += ms
+        if ms > self.grab_max_ms:
+            self.grab_max_ms = ms
+
+    def _reclaim(self):
+        while True:
+            try:
+                i, ok = self.done.get_nowait()
+            except queue.Empty:
+                return
+            self.free.append(i)
+            if ok:
+                self.written += 1
+            else:
+                self.errors += 1
+
+    def _start(self, size):
+        """(Re)allocate the ring for frames of `size` and start a writer on a new
+        segment. Only happens on the first frame and when the render scale changes."""
+        self._finish()
+        self.size = size
+        w, h = size
+        self.shm = [shared_memory.SharedMemory(create=True, size=w * h * 4) for _ in range(self.nbuffers)]
+        self.buffers = [pygame.image.frombuffer(m.buf, size, PIXELS) for m in self.shm]
+        self.free = list(range(self.nbuffers))
+        stamp = time.strftime("capture-%Y%m%d-%H%M%S")
+        if self.path is not None:
+            stamp += f"-{w}x{h}"
+        if self.fmt == "png":
+            self.path = os.path.join(self.directory, stamp)
+            os.makedirs(self.path, exist_ok=True)
+            ctx = mp.get_context("spawn")
+            self.jobs, self.done = ctx.Queue(), ctx.Queue()
+            self.writer = ctx.Process(target=_png_writer, name="frame-capture", daemon=True,
+                                      args=([m.name for m in self.shm], size, self.path, self.jobs, self.done))
+        else:
+            self.path = os.path.join(self.directory, stamp + ".skyframes")
+            self.jobs, self.done = queue.Queue(), queue.Queue()
+            self.writer = threading.Thread(target=_raw_writer, name="frame-capture", daemon=True,
+                                           args=([m.buf for m in self.shm], size, self.path, self.jobs, self.done))
+        self.writer.start()
+
+    def _finish(self):
+        """Let the writer drain the queued frames, stop it and free the ring."""
+        if self.writer is None:
+            return
+        self.jobs.put(None)
+        self.writer.join()
+        self.writer = None
+        self._reclaim()
+        self.buffers = []
+        for m in self.shm:
+            m.close()
+            m.unlink()
+        self.shm = []
+
+    def close(self):
+        self._finish()
+
+    def stats(self):
+        return {"frames": self.frames, "written": self.written, "dropped": self.dropped, "stopped": self.stopped,
+                "pending": self.nbuffers - len(self.free) if self.writer else 0, "errors": self.errors,
+                "grab_ms": self.grab_ms / self.frames if self.frames else 0.0,
+                "grab_max_ms": self.grab_max_ms}
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['written']} frames written to {self.path}, {s['dropped']} dropped of {s['frames']}; "
+                f"grab {s['grab_ms']:.3f} ms/frame (max {s['grab_max_ms']:.2f})"
+                + ("; stopped early: the writer died" if s["stopped"] else ""))
+
+# ---------------- writers ----------------
+def _raw_writer(views, size, path, jobs, done):
+    w, h = size
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, w, h, w * 4, *MASKS))
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            i, n, ms = job
+            try:
+                f.write(FRAME.pack(n, ms))
+                f.write(views[i])
+                done.put((i, True))
+            except OSError as e:
+                print("Capture write failed:", e)
+                done.put((i, False))
+
+def _png_writer(names, size, path, jobs, done):
+    # spawned children share the parent's resource tracker, so attaching doesn't
+    # register the blocks a second time; the capturing process unlinks them
+    shm = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            i, n, _ = job
+            try:
+                surf = pygame.image.frombuffer(shm[i].buf, size, PIXELS)
+                pygame.image.save(surf, os.path.join(path, f"frame-{n:06d}.png"))
+                del surf
+                done.put((i, True))
+            except (OSError, pygame.error) as e:
+                print("Capture write failed:", e)
+                done.put((i, False))
+    finally:
+        for m in shm:
+            m.close()
+
+# ---------------- raw files ----------------
+def read_raw(path):
+    """(header dict, iterator of (frame number, ms, Surface)) for a .skyframes file."""
+    f = open(path, "rb")
+    magic, version, w, h, pitch, *masks = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        f.close()
+        raise ValueError(f"{path}: not a v{VERSION} frame capture")
+    hd = {"width": w, "height": h, "pitch": pitch, "masks": masks}
+    def frames():
+        with f:
+            surf = pygame.Surface((w, h), 0, 32, masks + [0])
+            if surf.get_pitch() != pitch:
+                raise ValueError(f"{path}: unsupported row pitch {pitch}")
+            while True:
+                head = f.read(FRAME.size)
+                data = f.read(h * pitch)
+                if len(head) < FRAME.size or len(data) < h * pitch:
+                    return          # end (or a frame cut off by a crash)
+                n, ms = FRAME.unpack(head)
+                surf.get_buffer().write(data, 0)
+                yield n, ms, surf
+    return hd, frames()
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or convert raw frame captures")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    info = sub.add_parser("info", help="frame count, timing and gaps of a .skyframes file")
+    info.add_argument("path")
+    png = sub.add_parser("png", help="write every frame of a .skyframes file as a PNG")
+    png.add_argument("path")
+    png.add_argument("out")
+    args = ap.parse_args()
+
+    hd, frames = read_raw(args.path)
+    if args.cmd == "info":
+        count = gaps = 0
+        first = last = None
+        prev_n = -1
+        for n, ms, _ in frames:
+            count += 1
+            gaps += n - prev_n - 1
+            prev_n = n
+            first = ms if first is None else first
+            last = ms
+        span = (last - first) / 1000.0 if count > 1 else 0.0
+        print(f"{hd['width']}x{hd['height']}: {count} frames over {span:.1f} s "
+              f"({count / span if span else 0:.1f} fps), {gaps} dropped")
+        return
+    os.makedirs(args.out, exist_ok=True)
+    count = 0
+    for n, _, surf in frames:
+        pygame.image.save(surf, os.path.join(args.out, f"frame-{n:06d}.png"))
+        count += 1
+    print(f"{count} frames written to {args.out}")
+
+if __name__ == "__main__":
+    main()
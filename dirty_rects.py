@@ -0,0 +1,40 @@
+# dirty_rects.py
+# Optional dirty-rectangle presenter: push only the screen areas that changed.
+#
+# Game.draw(surf, dirty) restores the background under dirty.prev (what was
+# drawn last frame), redraws, then calls present() with this frame's rects.
+# The display gets update(prev + current) instead of a full flip(), unless the
+# changed area passes `threshold` of the screen (parallax scrolling, big
+# explosions) or a full redraw was requested, in which case it flips.
+
+import pygame
+
+class DirtyRenderer:
+    def __init__(self, size, threshold=0.45):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.threshold = threshold
+        self.prev = []        # rects drawn in the previous frame
+        self.full = True      # next frame must be a full redraw + flip
+        self.frames = 0
+        self.full_frames = 0
+        self.last_area = 0.0  # dirty fraction of the screen in the last frame
+
+    def invalidate(self):
+        """Something outside the tracked sprites changed (menu, overlay, resize)."""
+        self.full = True
+        self.prev = []
+
+    def present(self, rects):
+        clip = self.screen_rect.clip
+        cur = [c for c in (clip(r) for r in rects if r) if c.w and c.h]
+        dirty = self.prev + cur
+        self.prev = cur
+        total = self.screen_rect.w * self.screen_rect.h
+        self.last_area = sum(r.w * r.h for r in dirty) / total
+        self.frames += 1
+        if self.full or self.last_area > self.threshold:
+            pygame.display.flip()
+            self.full = False
+            self.full_frames += 1
+        else:
+            pygame.display.update(dirty)
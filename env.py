@@ -0,0 +1,268 @@
+# env.py
+# Gym-style environment around Game for training/evaluating autopilot agents,
+# plus a vectorized version that spreads N games over worker processes.
+#
+#   env = SkyEnv(difficulty="Hard")
+#   obs, info = env.reset(seed=1)
+#   obs, reward, terminated, truncated, info = env.step((0.5, 0.7, 1, 0))
+#
+#   venv = VecSkyEnv(64, workers=8)        # obs/reward/done live in shared memory
+#   obs = venv.reset(seed=0)
+#   obs, rewards, dones, finished = venv.step(actions)   # actions: (64, 4) float32
+#   venv.close()
+#
+#   python env.py --envs 64 --workers 8 --steps 2000   # random-action throughput
+#
+# Action: (tx, ty, shoot, buy). tx/ty in [0, 1] of the play area steer the ship
+# (a negative tx = don't steer), shoot > 0.5 holds the trigger, buy is an index
+# into PURCHASES (0 = nothing). Observation: "state" is a flat float32 vector
+# (player, upgrade costs, the nearest enemies and powerups, all normalized);
+# "pixels" is the rendered frame scaled down to frame_size, uint8 HxWx3.
+# Reward: points earned this step (not net of upgrade spending), minus
+# hp_penalty per HP lost. Episodes end at game over or after max_steps.
+
+import argparse, os, time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+PURCHASES = (None, "power", "firerate", "hp")
+PLAYER_FEATURES = 8
+ENEMY_FEATURES = 5
+POWERUP_FEATURES = 3
+
+class SkyEnv:
+    def __init__(self, size=(480, 800), difficulty="Normal", obs="state", frame_size=(48, 80),
+                 max_enemies=16, max_powerups=4, frame_skip=1, max_steps=36000, hp_penalty=5.0):
+        from headless import load_game
+        self.sky = sky = load_game(size)
+        self.difficulty = difficulty
+        self.obs_type = obs
+        self.frame_size = frame_size
+        self.max_enemies = max_enemies
+        self.max_powerups = max_powerups
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.hp_penalty = hp_penalty
+        self.game = None
+        self.steps = 0
+        if obs == "state":
+            self.obs_shape = (PLAYER_FEATURES + 3 + max_enemies * ENEMY_FEATURES
+                              + max_powerups * POWERUP_FEATURES,)
+            self.obs_dtype = np.float32
+        else:
+            self.obs_shape = (frame_size[1], frame_size[0], 3)
+            self.obs_dtype = np.uint8
+            self._frame = sky.pygame.Surface(frame_size)
+
+    def reset(self, seed=None):
+        # a fresh Game: upgrade costs would otherwise carry over between episodes
+        sky = self.sky
+        self.game = sky.Game(sky.TickClock(), seed=seed)
+        self.game.save_scores = False
+        self.game.set_difficulty(self.difficulty, seed=seed)
+        self.steps = 0
+        return self.observe(), {"seed": self.game.seed}
+
+    def step(self, action):
+        reward, terminated, truncated = self.advance(action)
+        return self.observe(), reward, terminated, truncated, {"score": self.game.score, "steps": self.steps}
+
+    def advance(self, action):
+        """step() without building the observation: (reward, terminated, truncated)."""
+        sky, g = self.sky, self.game
+        tx, ty, shoot, buy = action
+        touch = (int(tx * sky.WIDTH), int(ty * sky.PLAY_H)) if tx >= 0 else None
+        key = PURCHASES[int(buy)] if 0 < int(buy) < len(PURCHASES) else None
+        before = {k: (u["cost"], u["level"]) for k, u in g.upgrades.items()}
+        score = g.score; hp = g.player.hp
+        inputs = sky.FrameInput(touch, shoot > 0.5, (key,) if key else ())
+        for i in range(self.frame_skip):
+            g.step(inputs)
+            if g.state != "playing":
+                break
+            if i == 0 and key:
+                inputs = sky.FrameInput(touch, shoot > 0.5)
+        self.steps += 1
+        bought = [k for k, (cost, level) in before.items() if g.upgrades[k]["level"] > level]
+        earned = g.score - score + sum(before[k][0] for k in bought)
+        lost = max(0, hp + bought.count("hp") - g.player.hp)
+        reward = float(earned - self.hp_penalty * lost)
+        terminated = g.state != "playing"
+        truncated = not terminated and self.steps >= self.max_steps
+        return reward, terminated, truncated
+
+    def observe(self, out=None):
+        if self.obs_type != "state":
+            return self._pixels(out)
+        sky, g = self.sky, self.game
+        W, H = float(sky.WIDTH), float(sky.PLAY_H)
+        o = np.zeros(self.obs_shape, np.float32) if out is None else out
+        o[:] = 0.0
+        p = g.player
+        now = g.clock.ticks()
+        o[:PLAYER_FEATURES] = (p.x / W, p.y / H, p.hp / 10.0, p.damage / 10.0, p.effective_weapon() / 3.0,
+                               min(1.0, (now - p.last_shot) / max(1, p.shot_cool)), p.shot_cool / 1000.0,
+                               g.score / 100.0)
+        k = PLAYER_FEATURES
+        for u in g.upgrades.values():
+            o[k] = u["cost"] / 100.0; k += 1
+        en = g.enemies
+        n = len(en)
+        if n:
+            # nearest = lowest on screen (largest y) first
+            idx = np.argsort(-en.y[:n], kind="stable")[:self.max_enemies]
+            m = len(idx)
+            block = o[k:k + self.max_enemies * ENEMY_FEATURES].reshape(self.max_enemies, ENEMY_FEATURES)
+            block[:m, 0] = en.x[idx] / W
+            block[:m, 1] = en.y[idx] / H
+            block[:m, 2] = en.size[idx] / W
+            block[:m, 3] = en.hp[idx] / 20.0
+            block[:m, 4] = en.kind[idx]
+        k += self.max_enemies * ENEMY_FEATURES
+        for pu in g.powerups[:self.max_powerups]:
+            o[k] = pu.x / W; o[k + 1] = pu.y / H; o[k + 2] = 1.0 if pu.kind == "hp" else 2.0
+            k += POWERUP_FEATURES
+        return o
+
+    def _pixels(self, out=None):
+        sky = self.sky
+        self.game.draw(sky.screen)
+        sky.pygame.transform.scale(sky.screen, self.frame_size, self._frame)
+        rgb = sky.pygame.surfarray.pixels3d(self._frame).swapaxes(0, 1)
+        if out is None:
+            return np.array(rgb)
+        out[:] = rgb
+        return out
+
+# ---------------- vectorized ----------------
+def _worker(conn, lo, hi, env_kwargs, shm_names, shapes, dtypes):
+    shms = [shared_memory.SharedMemory(name=n) for n in shm_names]
+    obs, actions, rewards, dones = (np.ndarray(s, d, buffer=m.buf) for s, d, m in zip(shapes, dtypes, shms))
+    envs = [SkyEnv(**env_kwargs) for _ in range(lo, hi)]
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                finished = {}
+                for j, env in enumerate(envs):
+                    i = lo + j
+                    r, term, trunc = env.advance(actions[i])
+                    rewards[i] = r
+                    dones[i] = term or trunc
+                    if dones[i]:
+                        # auto-reset: obs[i] is the first obs of the next episode
+                        finished[i] = {"score": env.game.score, "steps": env.steps, "truncated": trunc}
+                        env.reset()
+                    env.observe(obs[i])
+                conn.send(finished)
+            elif cmd == "reset":
+                for j, env in enumerate(envs):
+                    env.reset(None if arg is None else arg + lo + j)
+                    env.observe(obs[lo + j])
+                conn.send(None)
+            elif cmd == "close":
+                break
+    finally:
+        # views into the buffers must go before the mappings close
+        del obs, actions, rewards, dones
+        for m in shms:
+            m.close()
+        conn.close()
+
+class VecSkyEnv:
+    """N SkyEnvs over `workers` processes; obs/actions/rewards/dones are shared
+    arrays, so a step only pipes a command and the finished episodes back.
+
+    step() returns (obs, rewards, dones, finished) where finished maps env index
+    -> {"score", "steps", "truncated"} for episodes that ended (and were reset).
+    """
+    def __init__(self, n, workers=None, start_method=None, **env_kwargs):
+        workers = max(1, min(n, workers or os.cpu_count() or 1))
+        probe = _shape_of(env_kwargs)
+        self.n = n
+        shapes = [(n,) + probe[0], (n, 4), (n,), (n,)]
+        dtypes = [probe[1], np.float32, np.float32, np.bool_]
+        self._shms = [shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(s)) * np.dtype(d).itemsize))
+                      for s, d in zip(shapes, dtypes)]
+        self.obs, self.actions, self.rewards, self.dones = (
+            np.ndarray(s, d, buffer=m.buf) for s, d, m in zip(shapes, dtypes, self._shms))
+        ctx = mp.get_context(start_method)
+        self.conns = []
+        self.procs = []
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=_worker, daemon=True,
+                            args=(child, int(lo), int(hi), env_kwargs, [m.name for m in self._shms], shapes, dtypes))
+            p.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(p)
+
+    def reset(self, seed=None):
+        for c in self.conns:
+            c.send(("reset", seed))
+        for c in self.conns:
+            c.recv()
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        for c in self.conns:
+            c.send(("step", None))
+        finished = {}
+        for c in self.conns:
+            finished.update(c.recv())
+        return self.obs, self.rewards, self.dones, finished
+
+    def close(self):
+        for c in self.conns:
+            try:
+                c.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self.procs:
+            p.join(5)
+        del self.obs, self.actions, self.rewards, self.dones
+        for m in self._shms:
+            m.close()
+            m.unlink()
+        self._shms = []
+
+def _shape_of(env_kwargs):
+    """Observation shape/dtype without loading the game in this process."""
+    if env_kwargs.get("obs", "state") == "state":
+        return ((PLAYER_FEATURES + 3 + env_kwargs.get("max_enemies", 16) * ENEMY_FEATURES
+                 + env_kwargs.get("max_powerups", 4) * POWERUP_FEATURES,), np.float32)
+    w, h = env_kwargs.get("frame_size", (48, 80))
+    return ((h, w, 3), np.uint8)
+
+def main():
+    ap = argparse.ArgumentParser(description="Random-action throughput of VecSkyEnv")
+    ap.add_argument("--envs", type=int, default=32)
+    ap.add_argument("--workers", type=int, default=0, help="default: one per CPU")
+    ap.add_argument("--steps", type=int, default=1000, help="vector steps (each steps every env)")
+    ap.add_argument("--obs", default="state", choices=["state", "pixels"])
+    ap.add_argument("--difficulty", default="Normal")
+    args = ap.parse_args()
+    venv = VecSkyEnv(args.envs, args.workers or None, obs=args.obs, difficulty=args.difficulty)
+    rng = np.random.default_rng(0)
+    try:
+        venv.reset(seed=0)
+        episodes = 0
+        t = time.perf_counter()
+        for _ in range(args.steps):
+            a = np.column_stack([rng.random(args.envs), 0.3 + 0.6 * rng.random(args.envs),
+                                 np.ones(args.envs), rng.integers(0, 4, args.envs) * (rng.random(args.envs) < 0.01)])
+            _, _, dones, _ = venv.step(a)
+            episodes += int(dones.sum())
+        secs = time.perf_counter() - t
+    finally:
+        venv.close()
+    total = args.envs * args.steps
+    print(f"{total} env steps in {secs:.2f} s = {total / secs:,.0f} steps/s "
+          f"({args.envs} envs, {len(venv.procs)} workers, {episodes} episodes finished)")
+
+if __name__ == "__main__":
+    main()
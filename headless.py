@@ -0,0 +1,32 @@
+# headless.py
+# Load the game module without a window or audio, for tests/benchmarks/bots.
+#
+#   from headless import load_game
+#   sky = load_game((480, 800))
+#   game = sky.Game(sky.TickClock())
+#   game.set_difficulty("Hard")
+#   while game.state == "playing":
+#       game.step(sky.FrameInput(touch_pos=(240, 500), shooting=True))
+
+import importlib.util, os, sys
+
+GAME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python space_2_5d_mobile.py")
+MODULE_NAME = "space_2_5d_mobile"
+
+def import_game():
+    """Import the game script (once) without calling setup()."""
+    mod = sys.modules.get(MODULE_NAME)
+    if mod is None:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, GAME_FILE)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[MODULE_NAME] = mod
+        spec.loader.exec_module(mod)
+    return mod
+
+def load_game(size=(480, 800), backend="surface"):
+    """Import the game script (once) and set it up headless at `size`.
+    backend="sdl2" draws through the SDL software renderer (see backend.py)."""
+    mod = import_game()
+    if mod.screen is None or (mod.WIDTH, mod.HEIGHT) != tuple(size) or (mod.TEXTURES is not None) != (backend == "sdl2"):
+        mod.setup(headless=True, size=size, backend=backend)
+    return mod
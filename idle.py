@@ -0,0 +1,67 @@
+# idle.py
+# Event-driven redraw for the static screens (menu, gameover).
+#
+# Nothing moves on those screens, so the main loop sleeps in wait() until input
+# arrives or `fps` comes around, and only redraws when the screen's key (state,
+# scores, layout...) changes or after input/expose events. The last composed
+# frame is kept as a snapshot: overlays that do change (profiler) are drawn on
+# top of restore() instead of re-rendering the frozen playfield.
+
+import pygame
+
+# events after which the display contents can't be trusted, or input happened
+REDRAW_EVENTS = {pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN, pygame.KEYUP,
+                 pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.APP_DIDENTERFOREGROUND}
+
+class IdleScreen:
+    def __init__(self, fps=10):
+        self.fps = fps              # wake-ups per second with no input
+        self.frame = None           # snapshot of the last composed frame
+        self.key = None
+        self.stale = True
+        self.redraws = 0
+        self.skipped = 0
+
+    def wait(self):
+        """Sleep until an event or the next idle tick; returns the pending events."""
+        first = pygame.event.wait(1000 // self.fps if self.fps else 0)
+        events = pygame.event.get()
+        if first.type != pygame.NOEVENT:
+            events.insert(0, first)
+        return events
+
+    def invalidate(self):
+        self.stale = True
+
+    def saw(self, events):
+        """Mark stale if any of `events` can change what's shown."""
+        for ev in events:
+            if ev.type in REDRAW_EVENTS:
+                self.stale = True
+                return
+
+    def needs_redraw(self, key):
+        if self.stale or self.frame is None or key != self.key:
+            self.redraws += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def store(self, surf, key):
+        """Snapshot `surf` as the frame for `key`, reusing the buffer when it fits
+        (a renderer target is read back into a new Surface instead)."""
+        if (self.frame is None or self.frame.get_size() != surf.get_size()
+                or not isinstance(surf, pygame.Surface)):
+            self.frame = surf.copy()
+        else:
+            self.frame.blit(surf, (0, 0))
+        self.key = key
+        self.stale = False
+
+    def restore(self, surf):
+        surf.blit(self.frame, (0, 0))
+
+    def leave(self):
+        """Back to normal play; the next idle screen is drawn from scratch."""
+        self.key = None
+        self.stale = True
@@ -0,0 +1,125 @@
+# particles.py
+# Fixed-capacity particle system stored as NumPy arrays (structure of arrays).
+#
+# Replaces one Python object per spark: emission fills a slice of the arrays,
+# update/cull is a handful of vectorized ops, and sprites() feeds a single
+# Surface.blits call (the game's "particles" render layer) with one
+# pre-rendered dot sprite per (color, size).
+
+import numpy as np
+import pygame
+
+GRAVITY = 0.12
+MAX_COLORS = 32
+MAX_SIZE = 8
+
+class ParticleBuffer:
+    def __init__(self, capacity=4096, scale=1.0, seed=None):
+        self.capacity = capacity
+        self.scale = scale          # WIDTH/480, applied to velocities
+        self.density = 1.0          # emit() count multiplier (quality tiers turn it down)
+        self.n = 0                  # live particles are [0, n)
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int16)
+        self.size = np.zeros(capacity, np.uint8)
+        self.color = np.zeros(capacity, np.uint8)   # index into palette
+        self.rng = np.random.default_rng(seed)
+        self.palette = []
+        self._color_ids = {}
+        self._sprites = [None] * (MAX_COLORS * MAX_SIZE)
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+
+    def color_id(self, color):
+        cid = self._color_ids.get(color)
+        if cid is None:
+            if len(self.palette) >= MAX_COLORS:
+                return 0
+            cid = len(self.palette)
+            self.palette.append(color)
+            self._color_ids[color] = cid
+        return cid
+
+    def emit(self, x, y, color, count, jitter_x=8, jitter_y=6):
+        """Burst of count*density sparks around (x, y); extra sparks past capacity are dropped."""
+        count = min(max(1, int(count * self.density + 0.5)), self.capacity - self.n)
+        if count <= 0:
+            return
+        a = self.n; b = a + count
+        rng = self.rng
+        self.x[a:b] = x + rng.uniform(-jitter_x, jitter_x, count)
+        self.y[a:b] = y + rng.uniform(-jitter_y, jitter_y, count)
+        self.vx[a:b] = rng.uniform(-2, 2, count) * self.scale
+        self.vy[a:b] = rng.uniform(-3, 0, count) * self.scale
+        self.life[a:b] = rng.integers(12, 27, count)
+        self.size[a:b] = rng.integers(2, 6, count)
+        self.color[a:b] = self.color_id(color)
+        self.n = b
+
+    def update(self):
+        n = self.n
+        if not n:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += GRAVITY
+        self.life[:n] -= 1
+        alive = self.life[:n] > 0
+        keep = int(np.count_nonzero(alive))
+        if keep == n:
+            return
+        for arr in (self.x, self.y, self.vx, self.vy, self.life, self.size, self.color):
+            arr[:keep] = arr[:n][alive]
+        self.n = keep
+
+    def positions(self, alpha=1.0):
+        """x, y of the live particles `alpha` of the way through the last update."""
+        n = self.n
+        if alpha >= 1.0:
+            return self.x[:n], self.y[:n]
+        back = 1.0 - alpha
+        # update() moved by vx and by vy before adding gravity to it
+        return self.x[:n] - self.vx[:n] * back, self.y[:n] - (self.vy[:n] - GRAVITY) * back
+
+    def bounds(self, alpha=1.0):
+        """(left, top, right, bottom) around every live particle, or None."""
+        n = self.n
+        if not n:
+            return None
+        r = int(self.size[:n].max()) + 1
+        x, y = self.positions(alpha)
+        return int(x.min()) - r, int(y.min()) - r, int(x.max()) + r + 1, int(y.max()) + r + 1
+
+    def _sprite(self, key):
+        cid, size = divmod(key, MAX_SIZE)
+        r = max(1, size)
+        spr = pygame.Surface((r*2 + 1, r*2 + 1))
+        spr.fill((0,0,0))
+        pygame.draw.circle(spr, self.palette[cid], (r, r), r)
+        spr.set_colorkey((0,0,0), pygame.RLEACCEL)
+        self._sprites[key] = spr
+        return spr
+
+    def sprites(self, alpha=1.0):
+        """(sprite, topleft) pairs for every live particle, in buffer order."""
+        n = self.n
+        if not n:
+            return ()
+        size = self.size[:n]
+        keys = self.color[:n].astype(np.int32) * MAX_SIZE + size
+        sprites = self._sprites
+        for k in np.unique(keys).tolist():
+            if sprites[k] is None:
+                self._sprite(k)
+        r = np.maximum(size, 1).astype(np.int32)
+        x, y = self.positions(alpha)
+        ox = (x.astype(np.int32) - r).tolist()
+        oy = (y.astype(np.int32) - r).tolist()
+        return zip(map(sprites.__getitem__, keys.tolist()), zip(ox, oy))
@@ -0,0 +1,61 @@
+# pool.py
+# Free-list object pools and in-place list compaction for game entities.
+#
+# Pooled classes implement reset(*args) with their constructor body, so a
+# recycled object is indistinguishable from a fresh one. Pool(enabled=False)
+# always constructs, which is how bench_alloc.py measures the difference.
+
+class Pool:
+    def __init__(self, cls, prealloc=0, enabled=True):
+        self.cls = cls
+        self.enabled = enabled
+        self.free = [cls.__new__(cls) for _ in range(prealloc)] if enabled else []
+        self.created = prealloc if enabled else 0
+        self.reused = 0
+
+    def acquire(self, *args, **kw):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kw)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args, **kw)
+
+    def release(self, obj):
+        if self.enabled:
+            self.free.append(obj)
+
+    def release_all(self, items):
+        if self.enabled:
+            self.free.extend(items)
+
+    def stats(self):
+        return {"created": self.created, "reused": self.reused, "free": len(self.free)}
+
+def compact(items, keep, release=None):
+    """Drop every item where keep(item) is false, in one in-place pass.
+
+    Order of the survivors is preserved (collision and draw order depend on
+    it); dropped items are handed to release().
+    """
+    j = 0
+    for it in items:
+        if keep(it):
+            items[j] = it
+            j += 1
+        elif release is not None:
+            release(it)
+    del items[j:]
+
+def compact_indices(items, dead, release=None):
+    """Like compact() but drops the items whose index is in the set `dead`."""
+    j = 0
+    for i, it in enumerate(items):
+        if i in dead:
+            if release is not None:
+                release(it)
+        else:
+            items[j] = it
+            j += 1
+    del items[j:]
@@ -0,0 +1,150 @@
+# profiler.py
+# Per-frame phase timings in a ring buffer, with an on-screen overlay and
+# CSV/JSON export.
+#
+#   PROFILER.begin_frame()
+#   ...; PROFILER.lap("events")      # time since the previous lap -> "events"
+#   ...; PROFILER.lap("update")
+#   PROFILER.end_frame(counts_fn, dt_ms)
+#
+# While disabled, begin_frame/lap/end_frame are bound to a no-op, so the
+# instrumented code pays one empty call per lap and nothing else.
+
+import csv, json, time
+import numpy as np
+import pygame
+
+MAX_PHASES = 24
+MAX_COUNTS = 8
+
+def _noop(*args, **kw):
+    pass
+
+class FrameProfiler:
+    def __init__(self, frames=3600, enabled=False):
+        self.frames = frames
+        self.phases = []          # column order of `times`
+        self._col = {}
+        self.count_names = []
+        self._count_col = {}
+        self.times = np.zeros((frames, MAX_PHASES))    # ms per phase
+        self.work = np.zeros(frames)                    # ms spent in the frame
+        self.interval = np.zeros(frames)                # ms between frames (clock.tick)
+        self.counts = np.zeros((frames, MAX_COUNTS), np.int32)
+        self.recorded = 0          # frames written so far (ring index = recorded % frames)
+        self.show = False          # overlay visible
+        self._t0 = self._last = 0.0
+        self._row = 0
+        self.set_enabled(enabled)
+
+    def set_enabled(self, on):
+        self.enabled = on
+        self.begin_frame = self.lap = self.end_frame = _noop
+        if on:
+            # recording starts at the next begin_frame: a frame already under
+            # way (F3 pressed mid-frame) has no start time to measure from
+            self.begin_frame = self._first_frame
+
+    def _first_frame(self):
+        self.begin_frame = self._begin_frame
+        self.lap = self._lap
+        self.end_frame = self._end_frame
+        self._begin_frame()
+
+    def _begin_frame(self):
+        self._row = self.recorded % self.frames
+        self.times[self._row] = 0.0
+        self._t0 = self._last = time.perf_counter()
+
+    def _lap(self, phase):
+        now = time.perf_counter()
+        col = self._col.get(phase)
+        if col is None:
+            if len(self.phases) >= MAX_PHASES:
+                return
+            col = self._col[phase] = len(self.phases)
+            self.phases.append(phase)
+        self.times[self._row, col] += (now - self._last) * 1000.0
+        self._last = now
+
+    def _end_frame(self, counts=None, dt_ms=0.0):
+        """counts: callable returning {name: int} (only called while enabled)."""
+        row = self._row
+        self.work[row] = (time.perf_counter() - self._t0) * 1000.0
+        self.interval[row] = dt_ms
+        if counts is not None:
+            for name, v in counts().items():
+                col = self._count_col.get(name)
+                if col is None:
+                    if len(self.count_names) >= MAX_COUNTS:
+                        continue
+                    col = self._count_col[name] = len(self.count_names)
+                    self.count_names.append(name)
+                self.counts[row, col] = v
+        self.recorded += 1
+
+    # ---------------- queries ----------------
+    def _rows(self):
+        """Ring rows in chronological order."""
+        n = min(self.recorded, self.frames)
+        if self.recorded <= self.frames:
+            return np.arange(n)
+        start = self.recorded % self.frames
+        return np.concatenate([np.arange(start, self.frames), np.arange(start)])
+
+    def summary(self):
+        rows = self._rows()
+        if not len(rows):
+            return {"frames": 0}
+        work = self.work[rows]
+        interval = self.interval[rows]
+        p = lambda a, q: round(float(np.percentile(a, q)), 3)
+        return {
+            "frames": int(len(rows)),
+            "work_ms": {"p50": p(work, 50), "p95": p(work, 95), "p99": p(work, 99), "max": round(float(work.max()), 3)},
+            "frame_ms": {"p50": p(interval, 50), "p95": p(interval, 95), "p99": p(interval, 99)},
+            "phase_mean_ms": {ph: round(float(self.times[rows, i].mean()), 4) for i, ph in enumerate(self.phases)},
+            "phase_p99_ms": {ph: p(self.times[rows, i], 99) for i, ph in enumerate(self.phases)},
+            "count_max": {c: int(self.counts[rows, i].max()) for i, c in enumerate(self.count_names)},
+        }
+
+    def export(self, prefix):
+        """Write <prefix>.csv (one row per frame) and <prefix>.json (summary)."""
+        rows = self._rows()
+        with open(prefix + ".csv", "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["frame", "work_ms", "frame_ms"] + self.phases + self.count_names)
+            first = self.recorded - len(rows)
+            for k, r in enumerate(rows.tolist()):
+                w.writerow([first + k, round(self.work[r], 4), round(self.interval[r], 4)]
+                           + [round(self.times[r, i], 4) for i in range(len(self.phases))]
+                           + [int(self.counts[r, i]) for i in range(len(self.count_names))])
+        with open(prefix + ".json", "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    # ---------------- overlay ----------------
+    def draw_overlay(self, surf, font, x=8, y=8, w=260, h=70, extra=()):
+        """Opaque panel with a work-time graph and percentiles; returns its rect."""
+        lines = []
+        s = self.summary()
+        if s["frames"]:
+            wm = s["work_ms"]
+            lines.append(f"work p50 {wm['p50']:.2f}  p95 {wm['p95']:.2f}  p99 {wm['p99']:.2f} ms")
+            top = sorted(s["phase_mean_ms"].items(), key=lambda kv: -kv[1])[:3]
+            lines.append("  ".join(f"{k} {v:.2f}" for k, v in top))
+        lines.extend(extra)
+        line_h = font.get_linesize()
+        panel = pygame.Rect(x, y, w, h + line_h * len(lines) + 6)
+        surf.fill((10, 10, 16), panel)
+        # graph: last `w` frames of work time, 0..2 frame budgets (33 ms) tall
+        rows = self._rows()[-w:]
+        if len(rows):
+            vals = np.minimum(self.work[rows] / 33.3, 1.0)
+            pts = [(x + i, y + h - int(v * h)) for i, v in enumerate(vals.tolist())]
+            budget_y = y + h - h // 2
+            pygame.draw.line(surf, (80, 80, 40), (x, budget_y), (x + w - 1, budget_y))
+            if len(pts) > 1:
+                pygame.draw.lines(surf, (120, 220, 120), False, pts)
+        for i, text in enumerate(lines):
+            surf.blit(font.render(text, True, (230, 230, 230)), (x + 4, y + h + 4 + i * line_h))
+        return panel
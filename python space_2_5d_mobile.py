@@ -6,22 +6,42 @@
 # Put fallen_down.mp3 in same folder.
 # Optional sounds: shoot.wav, explosion.wav, power.wav
 
-import pygame, random, os, math, sys, time
-pygame.init()
-try:
-    pygame.mixer.init()
-except:
-    pass
+import pygame, random, os, sys, time, argparse, struct
+import numpy as np
+from spatial_hash import SpatialHash
+from particles import ParticleBuffer
+from sprite_cache import SpriteCache, TextCache
+from dirty_rects import DirtyRenderer
+from pool import Pool, compact, compact_indices
+from starfield import Starfield
+from profiler import FrameProfiler
+from assets import load_scaled, DeferredLoader
+import replay
+import snapshot
+from capture import FrameCapture
+from scores import ScoreStore
+from audio import SoundManager
+from quality import QualityGovernor, TIERS
+from idle import IdleScreen
+from render_queue import RenderQueue, ShapeCache, shape_surface, circle_sprite, rect_sprite, bar_sprite
 
 # ---------------- Screen setup (mobile friendly) ----------------
-info = pygame.display.Info()
-WIDTH = info.current_w or 480
-HEIGHT = info.current_h or 800
-# Use FULLSCREEN; avoids (0,0) SCALED bug on some phones
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
-pygame.display.set_caption("Sky Defender 2.5D - @kawasakl_ninja")
-clock = pygame.time.Clock()
-FPS = 60
+# Everything that touches the display/mixer lives in setup() so the module can
+# be imported (tests, benchmarks, bots) without opening a window.
+WIDTH, HEIGHT = 480, 800
+screen = None         # what the game draws into: DISPLAY, or a smaller surface upscaled to it, or TEXTURES
+DISPLAY = None
+TEXTURES = None       # backend.TextureTarget when drawing through the SDL2 renderer (--backend sdl2)
+WINDOW = None
+RENDER_SCALE = 1.0
+clock = None
+FPS = 60              # render rate cap (0 = uncapped)
+IDLE_FPS = 10         # wake-ups per second on the menu/gameover screens without input
+AUTOSAVE_MS = 5000    # sim time between snapshots of the run in progress
+SIM_HZ = 60           # fixed simulation rate; all movement is tuned per tick at this rate
+SIM_STEP_MS = 1000.0 / SIM_HZ
+MAX_CATCHUP = 5       # sim steps per rendered frame before the game slows down instead
+HEADLESS = False
 
 # ---------------- Layout ----------------
 PANEL_H = int(100 * (WIDTH/480))   # bottom panel height
@@ -35,21 +55,43 @@ GREEN = (80,200,100)
 YELLOW = (230,210,60)
 UI_BG = (18,18,28)
 GRAY = (42,42,50)
-FONT = pygame.font.SysFont("Arial", max(14, int(16*(WIDTH/480))))
-BIG = pygame.font.SysFont("Arial", max(20, int(30*(WIDTH/480))))
+SPACE_BG = (6,10,20)
+HUD_KEY = (255,0,255)   # transparent colorkey of the pre-rendered HUD layer
+FONT = None
+BIG = None
 
 # ---------------- Assets loader ----------------
-def try_load_image(name, size=None):
+def try_load_image(name, size=None, convert=True):
+    # scaled images come from the .asset_cache pixel cache (see assets.py)
     if os.path.exists(name):
         try:
-            img = pygame.image.load(name).convert_alpha()
-            if size:
-                img = pygame.transform.smoothscale(img, size)
-            return img
+            img = load_scaled(name, size) if size else pygame.image.load(name)
+            return img.convert_alpha() if convert else img
         except Exception as e:
             print("Image load error:", name, e)
     return None
 
+def opaque_if_possible(img):
+    """Display-format copy of img, dropping per-pixel alpha when every pixel is opaque."""
+    try:
+        alpha = pygame.surfarray.pixels_alpha(img)
+        opaque = alpha.min() == 255
+        del alpha   # unlock the surface
+    except Exception:
+        return img.convert()    # no alpha channel (24-bit RGB): opaque already
+    return img.convert() if opaque else img.convert_alpha()
+
+def build_rotation_atlas(img, max_angle=12.0, step=1.0):
+    """Pre-rotated copies of img for angles -max_angle..+max_angle every `step` degrees."""
+    n = int(round(2 * max_angle / step)) + 1
+    return [pygame.transform.rotozoom(img, -max_angle + i*step, 1.0) for i in range(n)]
+
+def atlas_frame(atlas, angle, max_angle, step):
+    """Nearest atlas frame for angle, or None when it's outside the atlas range."""
+    if not atlas or abs(angle) > max_angle:
+        return None
+    return atlas[int(round((angle + max_angle) / step))]
+
 def try_load_sound(name):
     if os.path.exists(name):
         try:
@@ -61,64 +103,268 @@ def try_load_sound(name):
 # Provided asset filenames
 PLAYER_IMG_FILE = "file_00000000d2046243b1a262bb3cec5918.png"
 ENEMY_IMG_FILE  = "file_000000007cc4624380a676be6d71fb1c.png"
-IMG_PLAYER = try_load_image(PLAYER_IMG_FILE, (96,72))
-IMG_ENEMY  = try_load_image(ENEMY_IMG_FILE, (64,48))
-
-# background layers (try load up to 3 layers named bg_layer1.png etc)
+IMG_PLAYER = None
+PLAYER_ATLAS = []          # IMG_PLAYER pre-rotated for the usual tilt range
+PLAYER_TILT_RANGE = 12.0   # degrees covered by the atlas (beyond it: rotozoom)
+PLAYER_TILT_STEP = 1.0     # degrees between frames; larger = less memory, coarser
+IMG_ENEMY = None
+IMG_BOSS = None
 IMG_BG_LAYERS = []
-for i in range(1,4):
-    im = try_load_image(f"bg_layer{i}.png", (WIDTH, PLAY_H))
-    if im: IMG_BG_LAYERS.append(im)
+ENEMY_IMAGES = {}     # enemy kind -> source image, drawn through SPRITES
+STARFIELD = None      # pre-rendered star layers, used when there are no bg_layer images
+STAR_COUNT = 60
+PROFILER = FrameProfiler()   # disabled (no-op laps) unless --profile
+ASSET_LOADER = DeferredLoader()
+SPRITES = SpriteCache()
+SHAPES = ShapeCache()  # pre-rendered bullets, powerups, HP bars (see render_queue.py)
+POOLING = True        # recycle Bullet/PowerUp objects through free lists
+QUALITY = TIERS[0]    # current quality tier settings (see quality.py / apply_quality)
+MUSIC = None
+# sound effects: name, loaded Sound (ASSET_LOADER job), voice limits (see audio.py)
+SOUNDS = SoundManager()
+SOUND_CHANNELS = 8
+SOUNDS.define("shoot", "SND_SHOOT", max_voices=2, min_interval_ms=60, priority=0)
+SOUNDS.define("explode", "SND_EXPLODE", max_voices=3, min_interval_ms=35, priority=1)
+SOUNDS.define("power", "SND_POWER", max_voices=1, min_interval_ms=80, priority=2)
+SOUNDS.define("hit", "SND_EXPLODE", max_voices=2, min_interval_ms=0, priority=3)
+SOUNDS.define("boss_explode", "SND_EXPLODE", max_voices=2, min_interval_ms=0, priority=3)
 
-# sounds
-SND_SHOOT = try_load_sound("shoot.wav")
-SND_EXPLODE = try_load_sound("explosion.wav")
-SND_POWER = try_load_sound("power.wav")
+def setup(headless=False, size=None, render_scale=1.0, backend="surface", software=False):
+    """Init pygame, open the display and load assets.
 
-# music
-MUSIC = None
-music_file = os.path.join(os.path.dirname(__file__), "fallen_down.mp3")
-if os.path.exists(music_file):
-    try:
-        pygame.mixer.music.load(music_file)
-        pygame.mixer.music.set_volume(0.30)  # menu low
-        pygame.mixer.music.play(-1)
-        MUSIC = True
-    except Exception as e:
-        print("Music load failed:", e)
+    headless=True uses SDL's dummy video/audio drivers: no window, no sound,
+    and an off-screen `screen` of `size` (default 480x800) to draw into.
+    render_scale < 1 lays the game out and draws it at that fraction of the
+    display size; present_screen() upscales it.
+    backend="sdl2" draws through a pygame._sdl2 Renderer instead (see
+    backend.py); software=True, or headless, uses SDL's software renderer.
+    """
+    global DISPLAY, TEXTURES, WINDOW, clock, WIDTH, HEIGHT, HEADLESS
+    HEADLESS = headless
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    if not headless:
+        try:
+            pygame.mixer.init()
+        except:
+            pass
+        SOUNDS.init(SOUND_CHANNELS)
+
+    if size:
+        WIDTH, HEIGHT = size
+    elif headless:
+        WIDTH, HEIGHT = 480, 800
+    else:
+        info = pygame.display.Info()
+        WIDTH = info.current_w or 480
+        HEIGHT = info.current_h or 800
+    if backend == "sdl2":
+        from backend import open_window
+        DISPLAY = None
+        WINDOW, TEXTURES = open_window("Sky Defender 2.5D - @kawasakl_ninja", (WIDTH, HEIGHT),
+                                       fullscreen=not headless, software=software or headless)
+    elif headless:
+        DISPLAY = pygame.display.set_mode((WIDTH, HEIGHT))
+    else:
+        # Use FULLSCREEN; avoids (0,0) SCALED bug on some phones
+        DISPLAY = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+    pygame.display.set_caption("Sky Defender 2.5D - @kawasakl_ninja")
+    clock = pygame.time.Clock()
+
+    init_layout(render_scale)
+    if not headless:
+        # sounds
+        ASSET_LOADER.add("SND_SHOOT", lambda: try_load_sound("shoot.wav"))
+        ASSET_LOADER.add("SND_EXPLODE", lambda: try_load_sound("explosion.wav"))
+        ASSET_LOADER.add("SND_POWER", lambda: try_load_sound("power.wav"))
+        # music
+        ASSET_LOADER.add("MUSIC", load_music)
+    # headless runs want everything in place before the first tick
+    ASSET_LOADER.start(threaded=not headless)
+    apply_deferred_assets()
+
+def init_layout(render_scale=1.0):
+    """Size-dependent state: render surface, layout, fonts, sprites, starfield and
+    the background-layer jobs on a fresh ASSET_LOADER (not started)."""
+    global screen, RENDER_SCALE, WIDTH, HEIGHT, PANEL_H, PLAY_H, FONT, BIG
+    global IMG_PLAYER, PLAYER_ATLAS, IMG_ENEMY, IMG_BOSS, IMG_BG_LAYERS, ENEMY_IMAGES, SPRITES, STARFIELD
+    global ASSET_LOADER
+    SHAPES.clear()        # bullet/powerup sizes and the font scale with WIDTH
+    RENDER_SCALE = render_scale
+    if TEXTURES is not None:
+        # the renderer scales its logical size up to the window
+        dw, dh = WINDOW.size
+        WIDTH, HEIGHT = int(dw * render_scale), int(dh * render_scale)
+        TEXTURES.set_logical_size((WIDTH, HEIGHT))
+        screen = TEXTURES
+    elif render_scale == 1.0:
+        dw, dh = DISPLAY.get_size()
+        WIDTH, HEIGHT = dw, dh
+        screen = DISPLAY
+    else:
+        dw, dh = DISPLAY.get_size()
+        WIDTH, HEIGHT = int(dw * render_scale), int(dh * render_scale)
+        screen = pygame.Surface((WIDTH, HEIGHT)).convert()
+
+    PANEL_H = int(100 * (WIDTH/480))
+    PLAY_H = HEIGHT - PANEL_H
+    FONT = pygame.font.SysFont("Arial", max(14, int(16*(WIDTH/480))))
+    BIG = pygame.font.SysFont("Arial", max(20, int(30*(WIDTH/480))))
+
+    IMG_PLAYER = try_load_image(PLAYER_IMG_FILE, (96,72))
+    PLAYER_ATLAS = build_rotation_atlas(IMG_PLAYER, PLAYER_TILT_RANGE, PLAYER_TILT_STEP) if IMG_PLAYER else []
+    IMG_ENEMY  = try_load_image(ENEMY_IMG_FILE, (64,48))
+    IMG_BOSS   = try_load_image("boss.png")   # optional, else bosses are drawn as rects
+    ENEMY_IMAGES = {k: im for k, im in (("normal", IMG_ENEMY), ("boss", IMG_BOSS)) if im}
+
+    # scaled enemy sprites, snapped to 4px; prebuild the whole range EnemyManager.project produces
+    SPRITES = SpriteCache(smooth=QUALITY["smooth"])
+    if IMG_ENEMY:
+        base = int(56*(WIDTH/480))
+        SPRITES.prebuild("normal", IMG_ENEMY, max(12, int(base*0.6)), int(base*2.0), aspect=0.8)
+
+    # Background layers, sounds and music aren't needed to show the menu: they load
+    # on a worker thread and are picked up by apply_deferred_assets() from the main
+    # loop. The starfield covers for missing/not-yet-loaded layers.
+    IMG_BG_LAYERS = []
+    STARFIELD = Starfield((WIDTH, HEIGHT), PLAY_H, int(STAR_COUNT * QUALITY["stars"]), SPACE_BG)
+    ASSET_LOADER = DeferredLoader()
+    # background layers (try load up to 3 layers named bg_layer1.png etc)
+    for i in range(1,4):
+        name = f"bg_layer{i}.png"
+        if os.path.exists(name):
+            ASSET_LOADER.add("bg", lambda name=name: try_load_image(name, (WIDTH, PLAY_H), convert=False))
+
+def set_render_scale(render_scale):
+    """Re-layout at a new internal resolution (only between runs: Game objects
+    hold size-dependent state and must be recreated afterwards)."""
+    init_layout(render_scale)
+    ASSET_LOADER.start(threaded=not HEADLESS)
+    apply_deferred_assets()
+
+def present_screen():
+    if screen is TEXTURES:
+        TEXTURES.present()
+        return
+    if screen is not DISPLAY:
+        pygame.transform.scale(screen, DISPLAY.get_size(), DISPLAY)
+    pygame.display.flip()
+
+def to_screen(pos):
+    """Display (event) coordinates -> `screen` coordinates (the renderer already
+    reports events in its logical coordinates)."""
+    if screen is DISPLAY or screen is TEXTURES:
+        return pos
+    return (int(pos[0] * WIDTH / DISPLAY.get_width()), int(pos[1] * HEIGHT / DISPLAY.get_height()))
+
+def apply_quality(settings, game=None):
+    """Switch the live quality settings; render_scale is applied by the main loop
+    from the menu (see set_render_scale)."""
+    global QUALITY, STARFIELD
+    old, QUALITY = QUALITY, settings
+    if settings["smooth"] != SPRITES.smooth:
+        SPRITES.smooth = settings["smooth"]
+        SPRITES.clear()
+    if settings["stars"] != old["stars"]:
+        STARFIELD = Starfield((WIDTH, HEIGHT), PLAY_H, int(STAR_COUNT * settings["stars"]), SPACE_BG)
+    if game is not None:
+        game.particles.density = settings["particles"]
+
+def load_music():
+    music_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fallen_down.mp3")
+    if os.path.exists(music_file):
+        try:
+            pygame.mixer.music.load(music_file)
+            return True
+        except Exception as e:
+            print("Music load failed:", e)
+    return None
+
+def apply_deferred_assets(playing=False):
+    """Install whatever the asset loader finished since last call (main thread only)."""
+    global IMG_BG_LAYERS, MUSIC
+    for name, value in ASSET_LOADER.poll():
+        if not value:
+            continue
+        if name == "bg":
+            IMG_BG_LAYERS = IMG_BG_LAYERS + [opaque_if_possible(value)]
+        elif name == "MUSIC":
+            try:
+                pygame.mixer.music.set_volume(0.55 if playing else 0.28)
+                pygame.mixer.music.play(-1)
+                MUSIC = True
+            except Exception as e:
+                print("Music start failed:", e)
+        else:
+            SOUNDS.set_sound(name, value)    # SND_SHOOT, SND_EXPLODE, SND_POWER
 
 # ---------------- Highscore ----------------
-HS_FILE = "highscore.txt"
-def load_highscore():
-    try:
-        with open(HS_FILE,"r") as f:
-            return int(f.read().strip() or "0")
-    except:
-        return 0
-def save_highscore(v):
-    try:
-        with open(HS_FILE,"w") as f:
-            f.write(str(int(v)))
-    except:
-        pass
+HS_FILE = "highscore.txt"     # legacy single score, read once into the store
+SCORES = ScoreStore("scores.json", legacy=HS_FILE, keep=10)
+# the run in progress, so it survives the app being backgrounded/killed (see snapshot.py)
+SNAPSHOTS = snapshot.SnapshotWriter("run.skysnap")
+
+def save_run(game):
+    SNAPSHOTS.save(snapshot.dumps(game, WIDTH, HEIGHT, RENDER_SCALE, QUALITY["name"]))
 
 # ---------------- Helpers ----------------
-def draw_text(surf, txt, x, y, font=FONT, col=WHITE, center=False):
-    r = font.render(txt, True, col)
+TEXT = TextCache()
+
+def draw_text(surf, txt, x, y, font=None, col=WHITE, center=False):
+    r = TEXT.render(font or FONT, txt, col)
     if center:
-        surf.blit(r, (int(x - r.get_width()/2), int(y - r.get_height()/2)))
+        return surf.blit(r, (int(x - r.get_width()/2), int(y - r.get_height()/2)))
     else:
-        surf.blit(r, (int(x), int(y)))
+        return surf.blit(r, (int(x), int(y)))
 
 def clamp(v, a, b): return max(a, min(b, v))
 
+# ---------------- Time & input ----------------
+class RealClock:
+    """Wall-clock time source used by the interactive game."""
+    def ticks(self):
+        return pygame.time.get_ticks()
+
+    def time(self):
+        return time.time()
+
+class TickClock:
+    """Deterministic time source; Game.step advances it by step_ms per tick."""
+    def __init__(self, step_ms=SIM_STEP_MS, start_ms=0.0):
+        self.ms = float(start_ms)
+        self.step_ms = step_ms
+
+    def advance(self, ms=None):
+        self.ms += self.step_ms if ms is None else ms
+
+    def ticks(self):
+        return int(self.ms)
+
+    def time(self):
+        return self.ms / 1000.0
+
+class FrameInput:
+    """Player input for one simulation tick (see Game.step)."""
+    def __init__(self, touch_pos=None, shooting=False, purchases=()):
+        self.touch_pos = touch_pos     # (x, y) the ship steers toward, or None
+        self.shooting = shooting       # fire whenever the cooldown allows
+        self.purchases = purchases     # upgrade keys to buy this tick
+
 # ---------------- Entities ----------------
 class Player:
-    def __init__(self):
+    __slots__ = ("clock", "bullet_pool", "w", "h", "x", "y", "px", "py", "speed", "hp", "weapon_level",
+                 "temp_multi_until", "last_shot", "shot_cool", "damage", "tilt")
+
+    def __init__(self, clock=None, bullet_pool=None):
+        self.clock = clock or RealClock()
+        self.bullet_pool = bullet_pool or Pool(Bullet, enabled=False)
         self.w = 96 if IMG_PLAYER else int(64*(WIDTH/480))
         self.h = 72 if IMG_PLAYER else int(48*(WIDTH/480))
         self.x = WIDTH//2
         self.y = PLAY_H - self.h - 32
+        self.px = self.x; self.py = self.y    # position before the last tick (render interpolation)
         self.speed = 6.0 * (WIDTH/480)
         self.hp = 6
         self.weapon_level = 0    # permanent weapon level from pickups/upgrades (0..2)
@@ -130,22 +376,25 @@ class Player:
 
     def effective_weapon(self):
         # if temporary multi active, return highest (2)
-        if time.time() < self.temp_multi_until:
+        if self.clock.time() < self.temp_multi_until:
             return 2
         return self.weapon_level
 
-    def draw(self, surf):
+    def sprite(self, alpha=1.0):
+        """(surface, topleft) of the ship."""
+        x = self.px + (self.x - self.px) * alpha
+        y = self.py + (self.y - self.py) * alpha
+        if not IMG_PLAYER:
+            w, h = self.w, self.h
+            img = SHAPES.get(("ship", w, h), lambda: ship_sprite(w, h))
+            return img, (int(x) - w//2 - 2, int(y) - h//2 - 2)
         tilt_angle = -self.tilt * 12
-        if IMG_PLAYER:
-            img = IMG_PLAYER
-            if abs(tilt_angle) > 1:
+        img = IMG_PLAYER
+        if abs(tilt_angle) > 1:
+            img = atlas_frame(PLAYER_ATLAS, tilt_angle, PLAYER_TILT_RANGE, PLAYER_TILT_STEP)
+            if img is None:
                 img = pygame.transform.rotozoom(IMG_PLAYER, tilt_angle, 1.0)
-            r = img.get_rect(center=(int(self.x), int(self.y)))
-            surf.blit(img, r.topleft)
-        else:
-            pts = [(self.x, self.y - self.h//2),(self.x - self.w//2, self.y + self.h//2),(self.x + self.w//2, self.y + self.h//2)]
-            pygame.draw.polygon(surf, (70,140,220), pts)
-            pygame.draw.polygon(surf, WHITE, pts, 2)
+        return img, img.get_rect(center=(int(x), int(y))).topleft
 
     def move_toward(self, tx, ty, lerp=0.24):
         self.x += (tx - self.x) * lerp
@@ -157,26 +406,40 @@ class Player:
         self.tilt += (desired_tilt - self.tilt) * 0.18
 
     def can_shoot(self):
-        return pygame.time.get_ticks() - self.last_shot >= self.shot_cool
+        return self.clock.ticks() - self.last_shot >= self.shot_cool
 
     def shoot(self):
-        self.last_shot = pygame.time.get_ticks()
+        self.last_shot = self.clock.ticks()
         bullets = []
+        new = self.bullet_pool.acquire
         w = self.effective_weapon()
         if w == 0:
-            bullets.append(Bullet(self.x, self.y - self.h//2 - 6, -14, self.damage))
+            bullets.append(new(self.x, self.y - self.h//2 - 6, -14, self.damage))
         elif w == 1:
-            bullets.append(Bullet(self.x - 12, self.y - self.h//2 - 6, -14, self.damage))
-            bullets.append(Bullet(self.x + 12, self.y - self.h//2 - 6, -14, self.damage))
+            bullets.append(new(self.x - 12, self.y - self.h//2 - 6, -14, self.damage))
+            bullets.append(new(self.x + 12, self.y - self.h//2 - 6, -14, self.damage))
         else: # triple
-            bullets.append(Bullet(self.x, self.y - self.h//2 - 6, -14, self.damage))
-            bullets.append(Bullet(self.x - 16, self.y - self.h//2 + 2, -12, self.damage))
-            bullets.append(Bullet(self.x + 16, self.y - self.h//2 + 2, -12, self.damage))
-        if SND_SHOOT: SND_SHOOT.play()
+            bullets.append(new(self.x, self.y - self.h//2 - 6, -14, self.damage))
+            bullets.append(new(self.x - 16, self.y - self.h//2 + 2, -12, self.damage))
+            bullets.append(new(self.x + 16, self.y - self.h//2 + 2, -12, self.damage))
+        SOUNDS.play("shoot")
         return bullets
 
+def ship_sprite(w, h):
+    """Triangle ship for when the player image is missing, with a 2px margin."""
+    img = shape_surface(2*(w//2) + 5, 2*(h//2) + 5)
+    pts = [(w//2 + 2, 2), (2, 2*(h//2) + 2), (2*(w//2) + 2, 2*(h//2) + 2)]
+    pygame.draw.polygon(img, (70,140,220), pts)
+    pygame.draw.polygon(img, WHITE, pts, 2)
+    return img
+
 class Bullet:
+    __slots__ = ("x", "y", "vy", "r", "damage", "color")
+
     def __init__(self, x, y, vy, dmg):
+        self.reset(x, y, vy, dmg)
+
+    def reset(self, x, y, vy, dmg):
         self.x = x; self.y = y; self.vy = vy
         self.r = int(6*(WIDTH/480))
         self.damage = dmg
@@ -186,91 +449,182 @@ class Bullet:
         self.y += self.vy
         return not (self.y < -60 or self.y > HEIGHT + 60)
 
-    def draw(self, surf):
-        pygame.draw.circle(surf, self.color, (int(self.x), int(self.y)), self.r)
+    def sprite(self, alpha=1.0):
+        r = self.r
+        y = self.y - self.vy * (1.0 - alpha)
+        img = SHAPES.get(("bullet", self.color, r), lambda: circle_sprite(self.color, r))
+        return img, (int(self.x) - r, int(y) - r)
 
     def rect(self):
         return pygame.Rect(int(self.x-self.r), int(self.y-self.r), int(self.r*2), int(self.r*2))
 
-class Enemy:
-    def __init__(self, level=1, kind="normal"):
-        self.kind = kind
-        self.level = level
+    def bounds(self):
+        l = int(self.x-self.r); t = int(self.y-self.r); d = int(self.r*2)
+        return l, t, l + d, t + d
+
+ENEMY_KINDS = ("normal", "boss")
+
+class EnemyManager:
+    """All live enemies as parallel NumPy arrays (index i = one enemy).
+
+    update() moves and projects every enemy in one vectorized pass; `order`
+    is the far-to-near draw order, kept sorted incrementally instead of
+    re-sorting Python objects every frame.
+    """
+    FIELDS = (("z", np.float64), ("speed", np.float64), ("phase", np.float64),
+              ("spawn_x", np.float64), ("base_z", np.float64), ("hp", np.int64),
+              ("base_size", np.int64), ("kind", np.int8),
+              ("x", np.int64), ("y", np.int64), ("size", np.int64),    # projected
+              ("px", np.int64), ("py", np.int64))                      # x/y before the last tick
+
+    def __init__(self, clock=None, rng=None, capacity=64):
+        self.clock = clock or RealClock()
+        self.rng = rng or random.Random()
+        self.n = 0
+        self.capacity = capacity
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.order = np.zeros(0, np.intp)
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+        self.order = np.zeros(0, np.intp)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            arr = np.zeros(self.capacity, dtype)
+            arr[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, arr)
+
+    def spawn(self, level=1, kind="normal", hp_mul=1.0, speed_mul=1.0):
+        random = self.rng
         if kind == "boss":
-            self.base_size = int(130*(WIDTH/480))
-            self.base_z = 900
-            self.hp = int(8 + 4*level + random.randint(0,6))
-            self.speed = 1.1 + 0.06*level
-            self.score = 3 + level
+            base_size = int(130*(WIDTH/480))
+            base_z = 900
+            hp = int(8 + 4*level + random.randint(0,6))
+            speed = 1.1 + 0.06*level
         else:
-            self.base_size = int(56*(WIDTH/480))
-            self.base_z = random.randint(300, 700)
-            self.hp = max(1, int(1 + level*0.9 + random.choice([0,1])))
-            self.speed = 2.0 + level*0.15 + random.random()*0.6
-            self.score = 1
-        self.spawn_x = random.randint(self.base_size//2, WIDTH - self.base_size//2)
-        self.z = self.base_z
-        self.phase = random.random() * 7
-        self.update_screen_pos()
-
-    def update_screen_pos(self):
+            base_size = int(56*(WIDTH/480))
+            base_z = random.randint(300, 700)
+            hp = max(1, int(1 + level*0.9 + random.choice([0,1])))
+            speed = 2.0 + level*0.15 + random.random()*0.6
+        spawn_x = random.randint(base_size//2, WIDTH - base_size//2)
+        phase = random.random() * 7
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.z[i] = base_z; self.base_z[i] = base_z
+        self.speed[i] = speed * speed_mul
+        self.hp[i] = max(1, int(hp * hp_mul))
+        self.phase[i] = phase; self.spawn_x[i] = spawn_x
+        self.base_size[i] = base_size
+        self.kind[i] = ENEMY_KINDS.index(kind)
+        self.n += 1
+        self.project(i)
+        self.px[i] = self.x[i]; self.py[i] = self.y[i]
+        # newcomers are far away: slot into the draw order after equal depths
+        depth = -self.z[self.order]
+        self.order = np.insert(self.order, np.searchsorted(depth, -base_z, side="right"), i)
+        return i
+
+    def project(self, start=0):
+        """Screen x/y/size from z (same math as the old per-enemy update_screen_pos)."""
+        n = self.n
+        z = self.z[start:n]
         near = 80
-        far = max(350, self.base_z)
-        zc = clamp(self.z, near, far)
+        far = np.maximum(350, self.base_z[start:n])
+        zc = np.clip(z, near, far)
         t = (far - zc) / (far - near)  # 0..1 (1 = close)
         top_y = 40
         bottom_y = PLAY_H - 140
-        self.size = max(12, int(self.base_size * (0.6 + 1.4 * t)))
-        self.y = int(top_y + (bottom_y - top_y) * (1 - zc/far))
-        self.x = int(self.spawn_x + math.sin(time.time() + self.phase) * 16 * (1 - zc/far))
+        depth = 1 - zc/far
+        self.size[start:n] = np.maximum(12, (self.base_size[start:n] * (0.6 + 1.4 * t)).astype(np.int64))
+        self.y[start:n] = (top_y + (bottom_y - top_y) * depth).astype(np.int64)
+        sway = np.sin(self.clock.time() + self.phase[start:n]) * 16 * depth
+        self.x[start:n] = (self.spawn_x[start:n] + sway).astype(np.int64)
 
     def update(self):
-        # move toward player in z (reduce z)
-        self.z -= self.speed
-        self.update_screen_pos()
-        # return False if passed the "near" threshold -> triggers game over
-        return self.z > 40
-
-    def draw(self, surf):
-        rect = pygame.Rect(int(self.x - self.size//2), int(self.y - self.size//2), int(self.size), int(self.size))
-        if IMG_ENEMY and self.kind == "normal":
-            try:
-                img = pygame.transform.smoothscale(IMG_ENEMY, (self.size, max(12, int(self.size*0.8))))
-                surf.blit(img, img.get_rect(center=(self.x, self.y)).topleft)
-            except:
-                pygame.draw.rect(surf, RED, rect, border_radius=8)
-        else:
-            pygame.draw.rect(surf, RED if self.kind == "normal" else (150,40,40), rect, border_radius=8)
-        # hp bar
-        total = max(1, self.hp)
-        bar_w = int(self.size * (max(0, self.hp) / total))
-        pygame.draw.rect(surf, (40,40,40), (rect.left, rect.top - 8, self.size, 6))
-        pygame.draw.rect(surf, GREEN, (rect.left, rect.top - 8, bar_w, 6))
-
-    def rect(self):
-        return pygame.Rect(int(self.x - self.size//2), int(self.y - self.size//2), int(self.size), int(self.size))
+        """Move every enemy toward the player; False if one passed the near plane."""
+        n = self.n
+        if not n:
+            return True
+        z = self.z[:n]
+        z -= self.speed[:n]
+        self.px[:n] = self.x[:n]; self.py[:n] = self.y[:n]
+        self.project()
+        # nearly sorted already, so a stable (timsort) pass over the old order is cheap
+        o = self.order
+        self.order = o[np.argsort(-z[o], kind="stable")]
+        return not (z <= 40).any()
 
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x; self.y = y
-        self.vx = random.uniform(-2,2) * (WIDTH/480)
-        self.vy = random.uniform(-3,0) * (WIDTH/480)
-        self.life = random.randint(12,26)
-        self.color = color
-        self.size = random.randint(2,5)
+    def boxes(self):
+        """(left, top, right, bottom) per enemy, as used by the broad phase."""
+        n = self.n
+        half = self.size[:n] // 2
+        left = self.x[:n] - half
+        top = self.y[:n] - half
+        return zip(left.tolist(), top.tolist(), (left + self.size[:n]).tolist(), (top + self.size[:n]).tolist())
 
-    def update(self):
-        self.x += self.vx; self.y += self.vy
-        self.vy += 0.12
-        self.life -= 1
-        return self.life > 0
+    def remove(self, dead):
+        """Drop the enemies whose index is in `dead`, keeping everyone's order."""
+        n = self.n
+        keep = np.ones(n, bool)
+        keep[list(dead)] = False
+        k = int(keep.sum())
+        for name, _ in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        remap = np.cumsum(keep) - 1
+        o = self.order
+        self.order = remap[o[keep[o]]]
+        self.n = k
 
-    def draw(self, surf):
-        if self.life > 0:
-            pygame.draw.circle(surf, self.color, (int(self.x), int(self.y)), max(1,self.size))
+    def sprites(self, alpha=1.0):
+        """(surface, topleft) pairs far-to-near at `alpha` between the last two
+        ticks: each enemy followed by its HP bar."""
+        out = []
+        add = out.append
+        n = self.n
+        if alpha < 1.0:
+            xs = (self.px[:n] + (self.x[:n] - self.px[:n]) * alpha).astype(np.int64).tolist()
+            ys = (self.py[:n] + (self.y[:n] - self.py[:n]) * alpha).astype(np.int64).tolist()
+        else:
+            xs = self.x.tolist(); ys = self.y.tolist()
+        sizes = self.size.tolist()
+        kinds = self.kind.tolist(); hps = self.hp.tolist()
+        shape = SHAPES.get
+        for i in self.order.tolist():
+            x = xs[i]; y = ys[i]; size = sizes[i]; kind = ENEMY_KINDS[kinds[i]]
+            left = int(x - size//2); top = int(y - size//2)
+            src = ENEMY_IMAGES.get(kind)
+            img = None
+            if src:
+                try:
+                    img = SPRITES.get(kind, src, size, aspect=0.8)
+                    add((img, img.get_rect(center=(x, y)).topleft))
+                except:
+                    img = None
+            if img is None:
+                col = RED if src or kind == "normal" else (150,40,40)
+                add((shape(("enemy", col, size), lambda: rect_sprite(col, size, size, 8)), (left, top)))
+            # hp bar
+            total = max(1, hps[i])
+            bar_w = int(size * (max(0, hps[i]) / total))
+            add((shape(("hp_bar", size, bar_w), lambda: bar_sprite((40,40,40), GREEN, size, 6, bar_w)),
+                 (left, top - 8)))
+        return out
 
 class PowerUp:
+    __slots__ = ("x", "y", "kind", "vy", "size")
+
     def __init__(self, x, y, kind):
+        self.reset(x, y, kind)
+
+    def reset(self, x, y, kind):
         self.x = x; self.y = y; self.kind = kind; self.vy = 1.2 * (WIDTH/480)
         self.size = int(14*(WIDTH/480))
 
@@ -278,28 +632,45 @@ class PowerUp:
         self.y += self.vy
         return self.y - self.size <= PLAY_H
 
-    def draw(self, surf):
+    def sprites(self, alpha=1.0):
+        """The disc, then its H/P label as a separate blit (antialiased against
+        the disc on the target, not baked into the colorkeyed disc sprite)."""
+        size = self.size
+        y = self.y - self.vy * (1.0 - alpha)
         col = GREEN if self.kind == "hp" else YELLOW
-        pygame.draw.circle(surf, col, (int(self.x), int(self.y)), self.size)
-        draw_text(surf, "H" if self.kind=="hp" else "P", int(self.x-6), int(self.y-8), FONT, WHITE)
+        disc = SHAPES.get(("powerup", col, size), lambda: circle_sprite(col, size))
+        label = TEXT.render(FONT, "H" if self.kind == "hp" else "P", WHITE)
+        return (disc, (int(self.x) - size, int(y) - size)), (label, (int(self.x-6), int(y-8)))
 
-    def rect(self):
-        return pygame.Rect(int(self.x-self.size), int(self.y-self.size), int(self.size*2), int(self.size*2))
+    def bounds(self):
+        l = int(self.x-self.size); t = int(self.y-self.size); d = int(self.size*2)
+        return l, t, l + d, t + d
 
 # ---------------- Game manager ----------------
 class Game:
-    def __init__(self):
-        self.player = Player()
+    def __init__(self, clock=None, seed=None):
+        self.clock = clock or RealClock()
+        # every gameplay roll comes from self.rng; start_game() reseeds it per run
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.save_scores = True     # replays/bots must not touch the score store
+        self.resumed = False        # run restored from a snapshot (not recordable)
+        # free lists for the short-lived entities (see pool.py)
+        self.bullet_pool = Pool(Bullet, 256, enabled=POOLING)
+        self.powerup_pool = Pool(PowerUp, 16, enabled=POOLING)
+        self.player = Player(self.clock, self.bullet_pool)
         self.bullets = []
-        self.enemies = []
-        self.particles = []
+        self.enemies = EnemyManager(self.clock, self.rng)
+        self.particles = ParticleBuffer(scale=WIDTH/480)
+        self.particles.density = QUALITY["particles"]
         self.powerups = []
         self.score = 0
-        self.highscore = load_highscore()
-        self.spawn_timer = pygame.time.get_ticks()
+        self.highscore = SCORES.best()
+        self.rank = None            # leaderboard place of the last finished run
+        self.spawn_timer = self.clock.ticks()
         self.spawn_interval_ms = 1100
-        self.start_time = pygame.time.get_ticks()
-        self.state = "menu"   # menu, playing, gameover
+        self.start_time = self.clock.ticks()
+        self.state = "menu"   # menu, playing, paused (resumed run waiting for a tap), gameover
         self.difficulty = "Normal"
         self.upgrades = {
             "power": {"cost": 6, "level": 0},
@@ -310,8 +681,21 @@ class Game:
         self.enemy_speed_mul = 1.0
         self.points_per_kill = 1
         self.boss_chance = 0.03
+        # broad phase grids, rebuilt every tick in update()
+        self.enemy_grid = SpatialHash(int(64*(WIDTH/480)))
+        self.powerup_grid = SpatialHash(int(64*(WIDTH/480)))
+        self._hud = None        # pre-rendered HUD layer and the values it shows
+        self._hud_key = None
+        # draw order: enemies far-to-near (each with its HP bar), bullets, powerups,
+        # particles, player
+        self.render_queue = RenderQueue()
+        self.render_queue.add_layer("enemies", ordered=True)
+        self.render_queue.add_layer("bullets")
+        self.render_queue.add_layer("powerups", ordered=True)
+        self.render_queue.add_layer("particles", ordered=True, track=False)
+        self.render_queue.add_layer("player", ordered=True)
 
-    def set_difficulty(self, d):
+    def set_difficulty(self, d, seed=None):
         self.difficulty = d
         if d == "Easy":
             self.enemy_hp_mul = 0.85; self.enemy_speed_mul = 0.9; self.spawn_interval_ms = 1400; self.boss_chance = 0.01; self.points_per_kill = 1
@@ -319,18 +703,25 @@ class Game:
             self.enemy_hp_mul = 1.0; self.enemy_speed_mul = 1.0; self.spawn_interval_ms = 1100; self.boss_chance = 0.03; self.points_per_kill = 1
         else:
             self.enemy_hp_mul = 1.25; self.enemy_speed_mul = 1.1; self.spawn_interval_ms = 800; self.boss_chance = 0.06; self.points_per_kill = 1
-        self.start_game()
+        self.start_game(seed)
 
-    def start_game(self):
-        self.player = Player()
+    def start_game(self, seed=None):
+        """New run; seed=None draws the run's seed from the previous stream."""
+        self.seed = self.rng.getrandbits(63) if seed is None else seed
+        self.rng.seed(self.seed)
+        self.particles.rng = np.random.default_rng(self.seed)
+        self.player = Player(self.clock, self.bullet_pool)
+        self.bullet_pool.release_all(self.bullets)
+        self.powerup_pool.release_all(self.powerups)
         self.bullets = []
-        self.enemies = []
-        self.particles = []
+        self.enemies.clear()
+        self.particles.clear()
         self.powerups = []
         self.score = 0
-        self.spawn_timer = pygame.time.get_ticks()
-        self.start_time = pygame.time.get_ticks()
+        self.spawn_timer = self.clock.ticks()
+        self.start_time = self.clock.ticks()
         self.state = "playing"
+        self.resumed = False
         try:
             if MUSIC:
                 pygame.mixer.music.set_volume(0.55)
@@ -341,7 +732,10 @@ class Game:
         self.state = "gameover"
         if self.score > self.highscore:
             self.highscore = self.score
-            save_highscore(self.highscore)
+        if self.save_scores:
+            self.rank = SCORES.submit(self.score, difficulty=self.difficulty, seed=self.seed,
+                                      duration_s=round((self.clock.ticks() - self.start_time) / 1000.0, 1),
+                                      upgrades={k: v["level"] for k, v in self.upgrades.items()})
         try:
             if MUSIC:
                 pygame.mixer.music.set_volume(0.28)
@@ -349,14 +743,9 @@ class Game:
             pass
 
     def spawn_enemy(self):
-        level = 1 + int((pygame.time.get_ticks() - self.start_time) / 12000) + min(8, self.score//12)
-        if random.random() < min(0.12, self.boss_chance + level*0.002):
-            e = Enemy(level, kind="boss")
-        else:
-            e = Enemy(level, kind="normal")
-        e.hp = max(1, int(e.hp * self.enemy_hp_mul))
-        e.speed *= self.enemy_speed_mul
-        self.enemies.append(e)
+        level = 1 + int((self.clock.ticks() - self.start_time) / 12000) + min(8, self.score//12)
+        kind = "boss" if self.rng.random() < min(0.12, self.boss_chance + level*0.002) else "normal"
+        self.enemies.spawn(level, kind, self.enemy_hp_mul, self.enemy_speed_mul)
 
     def purchase(self, key):
         if key not in self.upgrades: return
@@ -371,152 +760,233 @@ class Game:
             elif key == "hp":
                 self.player.hp += 1
             info["cost"] = int(info["cost"] * 1.9)
-            if SND_POWER: SND_POWER.play()
+            SOUNDS.play("power")
+
+    def step(self, inputs=None, dt_ms=None):
+        """Advance the simulation one tick: apply inputs, update, tick the clock
+        (by dt_ms, or the clock's fixed step)."""
+        player = self.player
+        player.px = player.x; player.py = player.y
+        if self.state == "playing" and inputs is not None:
+            for key in inputs.purchases:
+                self.purchase(key)
+            # move player toward touch position if available
+            if inputs.touch_pos:
+                mx,my = inputs.touch_pos
+                if my < PLAY_H:
+                    self.player.move_toward(mx, my)
+            # auto-shoot when holding
+            if inputs.shooting and self.player.can_shoot():
+                self.bullets.extend(self.player.shoot())
+        PROFILER.lap("input")
+        self.update()
+        if hasattr(self.clock, "advance"):
+            self.clock.advance(dt_ms)
+
+    def counts(self):
+        return {"enemies": len(self.enemies), "bullets": len(self.bullets),
+                "particles": len(self.particles), "powerups": len(self.powerups)}
 
     def update(self):
         if self.state != "playing":
             return
+        lap = PROFILER.lap
 
-        now = pygame.time.get_ticks()
+        now = self.clock.ticks()
         if now - self.spawn_timer >= self.spawn_interval_ms:
             self.spawn_enemy()
             self.spawn_timer = now
             self.spawn_interval_ms = max(420, int(self.spawn_interval_ms * 0.994))
+        lap("spawn")
 
         # bullets update
-        for b in self.bullets[:]:
-            alive = b.update()
-            if not alive:
-                try: self.bullets.remove(b)
-                except: pass
+        compact(self.bullets, Bullet.update, self.bullet_pool.release)
+        lap("bullets")
 
         # enemies update
-        for e in self.enemies[:]:
-            alive = e.update()
-            if not alive:
-                # enemy passed -> game over
-                self.end_game()
-                return
-
-        # collisions bullets -> enemies
-        for b in self.bullets[:]:
-            br = b.rect()
-            hit = False
-            for e in self.enemies[:]:
-                if br.colliderect(e.rect()):
-                    e.hp -= b.damage
-                    try: self.bullets.remove(b)
-                    except: pass
-                    hit = True
-                    if e.hp <= 0:
-                        # kill
-                        self.score += self.points_per_kill
-                        r = random.random()
-                        if r < 0.12:
-                            self.powerups.append(PowerUp(e.x, e.y, "hp"))
-                        elif r < 0.22:
-                            self.powerups.append(PowerUp(e.x, e.y, "multi"))
-                        for _ in range(8):
-                            self.particles.append(Particle(e.x + random.uniform(-8,8), e.y + random.uniform(-6,6), YELLOW))
-                        if SND_EXPLODE: SND_EXPLODE.play()
-                        try: self.enemies.remove(e)
-                        except: pass
-                    break
-            if hit: continue
+        enemies = self.enemies
+        if not enemies.update():
+            # enemy passed -> game over
+            self.end_game()
+            return
+        lap("enemies")
+
+        # broad phase: hash enemies by screen rect (indices into `enemies`)
+        grid = self.enemy_grid
+        grid.clear()
+        for i,box in enumerate(enemies.boxes()):
+            grid.insert(i, *box)
+        killed = set()
+        hp = enemies.hp
+
+        # collisions bullets -> enemies (first enemy in list order wins, as before)
+        spent = []
+        for bi,b in enumerate(self.bullets):
+            for ei in grid.hits(*b.bounds()):
+                if ei in killed: continue
+                hp[ei] -= b.damage
+                spent.append(bi)
+                if hp[ei] <= 0:
+                    # kill
+                    self.score += self.points_per_kill
+                    ex = int(enemies.x[ei]); ey = int(enemies.y[ei])
+                    r = self.rng.random()
+                    if r < 0.12:
+                        self.powerups.append(self.powerup_pool.acquire(ex, ey, "hp"))
+                    elif r < 0.22:
+                        self.powerups.append(self.powerup_pool.acquire(ex, ey, "multi"))
+                    self.particles.emit(ex, ey, YELLOW, 8, 8, 6)
+                    SOUNDS.play("boss_explode" if enemies.kind[ei] else "explode")
+                    killed.add(ei)
+                break
+        if spent:
+            compact_indices(self.bullets, set(spent), self.bullet_pool.release)
+        lap("collide")
+
+        player = self.player
+        pl = int(player.x - player.w//2); pt = int(player.y - player.h//2)
+        player_box = (pl, pt, pl + int(player.w), pt + int(player.h))
 
         # powerups update / pickup
-        for pu in self.powerups[:]:
-            ok = pu.update()
-            if not ok:
-                try: self.powerups.remove(pu)
-                except: pass
-                continue
-            if pu.rect().colliderect(pygame.Rect(self.player.x - self.player.w//2, self.player.y - self.player.h//2, self.player.w, self.player.h)):
-                if pu.kind == "hp":
-                    self.player.hp += 1
-                else:  # multi (P) powerup
-                    self.player.temp_multi_until = time.time() + 20.0  # 20 seconds duration
-                try: self.powerups.remove(pu)
-                except: pass
-                if SND_POWER: SND_POWER.play()
+        pgrid = self.powerup_grid
+        pgrid.clear()
+        falling = self.powerups
+        compact(falling, PowerUp.update, self.powerup_pool.release)
+        for i,pu in enumerate(falling):
+            pgrid.insert(i, *pu.bounds())
+        picked = pgrid.hits(*player_box)
+        for i in picked:
+            pu = falling[i]
+            if pu.kind == "hp":
+                player.hp += 1
+            else:  # multi (P) powerup
+                player.temp_multi_until = self.clock.time() + 20.0  # 20 seconds duration
+            SOUNDS.play("power")
+        if picked:
+            compact_indices(falling, set(picked), self.powerup_pool.release)
+        lap("powerups")
 
         # particles update
-        for p in self.particles[:]:
-            ok = p.update()
-            if not ok:
-                try: self.particles.remove(p)
-                except: pass
+        self.particles.update()
+        lap("particles")
 
         # enemy collision with player
-        for e in self.enemies[:]:
-            enemy_rect = e.rect()
-            player_rect = pygame.Rect(int(self.player.x - self.player.w//2), int(self.player.y - self.player.h//2), int(self.player.w), int(self.player.h))
-            if enemy_rect.colliderect(player_rect):
-                self.player.hp -= 1
-                for _ in range(6):
-                    self.particles.append(Particle(self.player.x + random.uniform(-6,6), self.player.y + random.uniform(-6,6), RED))
-                try: self.enemies.remove(e)
-                except: pass
-                if SND_EXPLODE: SND_EXPLODE.play()
-                if self.player.hp <= 0:
-                    self.end_game()
-                    return
-
-    def draw(self, surf):
+        for ei in grid.hits(*player_box):
+            if ei in killed: continue
+            player.hp -= 1
+            self.particles.emit(player.x, player.y, RED, 6, 6, 6)
+            killed.add(ei)
+            SOUNDS.play("hit")
+            if player.hp <= 0:
+                self.end_game()
+                break
+        if killed:
+            enemies.remove(killed)
+        lap("player_hits")
+
+    def render_time(self, alpha=1.0):
+        """Clock time (s) `alpha` of the way through the last tick, for drawing."""
+        return self.clock.time() - (1.0 - alpha) * getattr(self.clock, "step_ms", 0.0) / 1000.0
+
+    def draw_background(self, surf, t=None):
+        """Full background; returns the rects it covers that change every frame."""
+        if t is None:
+            t = self.clock.time()
         # background layers parallax
         if IMG_BG_LAYERS:
-            for i,layer in enumerate(IMG_BG_LAYERS):
+            for i,layer in enumerate(IMG_BG_LAYERS[:QUALITY["bg_layers"]]):
                 speed = 0.1 + 0.18 * i
-                offset = int((time.time()*30*speed + self.player.x*0.06*(i+1)) % WIDTH)
+                offset = int((t*30*speed + self.player.x*0.06*(i+1)) % WIDTH)
                 surf.blit(layer, (-offset, 0))
                 surf.blit(layer, (-offset + WIDTH, 0))
+            return [surf.get_rect()]
+        STARFIELD.draw(surf, t)
+        return STARFIELD.rects(t)
+
+    def draw(self, surf, dirty=None, alpha=1.0):
+        """Draw the playfield, interpolated `alpha` (0..1) of the way from the
+        previous tick to the current one. With a DirtyRenderer only what changed
+        is repainted and pushed to the display (dirty.present), otherwise the
+        caller flips."""
+        t = self.render_time(alpha)
+        if dirty is None or dirty.full or IMG_BG_LAYERS:
+            rects = self.draw_background(surf, t)
         else:
-            surf.fill((6,10,20))
-            for si in range(60):
-                sx = (si*73 + int(time.time()*60)) % WIDTH
-                sy = (si*37) % PLAY_H
-                pygame.draw.circle(surf, (160,160,200), (sx, sy), 1)
-
-        # draw enemies by depth (far -> back first)
-        sorted_enemies = sorted(self.enemies, key=lambda e: e.z, reverse=True)
-        for e in sorted_enemies:
-            e.draw(surf)
-
-        # bullets, powerups, particles
-        for b in self.bullets: b.draw(surf)
-        for pu in self.powerups: pu.draw(surf)
-        for p in self.particles: p.draw(surf)
-
-        # player
-        self.player.draw(surf)
-
-        # bottom HUD with upgrade buttons placed higher (so easy to tap)
-        # We'll place upgrade buttons above bottom edge so they are reachable
+            # restore the plain background under last frame's sprites, then re-add stars
+            for r in dirty.prev:
+                surf.fill(SPACE_BG, r)
+            rects = STARFIELD.draw_points(surf, t)
+        lap = PROFILER.lap
+        lap("draw_bg")
+
+        # everything on the playfield goes through the render queue, one blits per layer
+        queue = self.render_queue
+        # enemies by depth (far -> back first)
+        queue.extend("enemies", self.enemies.sprites(alpha))
+        lap("draw_enemies")
+
+        # bullets, powerups, particles, player
+        queue.extend("bullets", [b.sprite(alpha) for b in self.bullets])
+        queue.extend("powerups", [pair for pu in self.powerups for pair in pu.sprites(alpha)])
+        queue.extend("particles", self.particles.sprites(alpha))
+        pb = self.particles.bounds(alpha)
+        if pb:
+            rects.append(pygame.Rect(pb[0], pb[1], pb[2] - pb[0], pb[3] - pb[1]))
+        queue.extend("player", (self.player.sprite(alpha),))
+        queue.flush(surf, rects if dirty is not None else None)
+        lap("draw_sprites")
+
+        hud = self.draw_hud(surf)
+        lap("draw_hud")
+        if dirty is not None:
+            if hud:
+                rects.append(hud)
+            dirty.present(rects)
+            lap("present")
+
+    def draw_hud(self, surf):
+        # bottom HUD with upgrade buttons placed higher (so easy to tap).
+        # It only changes with these values, so it's composited once per change.
+        key = (self.score, self.player.hp, self.player.damage, self.player.weapon_level, self.highscore,
+               tuple(u["cost"] for u in self.upgrades.values()))
         hud_y = PLAY_H - int(64 * (WIDTH/480))
-        pygame.draw.rect(surf, UI_BG, (0, hud_y, WIDTH, PANEL_H + int(64*(WIDTH/480))))
-        draw_text(surf, f"Score: {self.score}", 12, hud_y + 6)
-        draw_text(surf, f"HP: {self.player.hp}", WIDTH - 140, hud_y + 6)
-        draw_text(surf, f"Weapon: {['SINGLE','DUAL','TRIPLE'][self.player.weapon_level]}", 12, hud_y + 36)
-        draw_text(surf, f"Damage: {self.player.damage}", 12, hud_y + 64)
-        draw_text(surf, f"Highscore: {self.highscore}", WIDTH - 200, hud_y + 36)
-        draw_text(surf, f"Creator: @kawasakl_ninja", WIDTH - 260, hud_y + 64)
+        by = hud_y - int(56*(WIDTH/480))  # upgrade buttons, moved up
+        changed = key != self._hud_key or self._hud is None
+        if changed:
+            self._hud = self.render_hud(hud_y, by)
+            self._hud_key = key
+        r = surf.blit(self._hud, (0, by))
+        return r if changed else None
+
+    def render_hud(self, hud_y, by):
+        layer = pygame.Surface((WIDTH, HEIGHT - by))
+        layer.fill(HUD_KEY)
+        layer.set_colorkey(HUD_KEY, pygame.RLEACCEL)
+        hud_y -= by
+        pygame.draw.rect(layer, UI_BG, (0, hud_y, WIDTH, PANEL_H + int(64*(WIDTH/480))))
+        draw_text(layer, f"Score: {self.score}", 12, hud_y + 6)
+        draw_text(layer, f"HP: {self.player.hp}", WIDTH - 140, hud_y + 6)
+        draw_text(layer, f"Weapon: {['SINGLE','DUAL','TRIPLE'][self.player.weapon_level]}", 12, hud_y + 36)
+        draw_text(layer, f"Damage: {self.player.damage}", 12, hud_y + 64)
+        draw_text(layer, f"Highscore: {self.highscore}", WIDTH - 200, hud_y + 36)
+        draw_text(layer, f"Creator: @kawasakl_ninja", WIDTH - 260, hud_y + 64)
 
         # draw upgrade buttons above panel (easier to tap)
         pad = int(12*(WIDTH/480))
         bw = int((WIDTH - pad*5) / 3)
         bx = pad
-        by = hud_y - int(56*(WIDTH/480))  # moved up
-        pygame.draw.rect(surf, GRAY, (bx, by, bw, 48), border_radius=10)
-        draw_text(surf, f"Power + (cost {self.upgrades['power']['cost']})", bx + bw//2, by + 24, center=True)
+        pygame.draw.rect(layer, GRAY, (bx, 0, bw, 48), border_radius=10)
+        draw_text(layer, f"Power + (cost {self.upgrades['power']['cost']})", bx + bw//2, 24, center=True)
         bx += bw + pad
-        pygame.draw.rect(surf, GRAY, (bx, by, bw, 48), border_radius=10)
-        draw_text(surf, f"FireRate (cost {self.upgrades['firerate']['cost']})", bx + bw//2, by + 24, center=True)
+        pygame.draw.rect(layer, GRAY, (bx, 0, bw, 48), border_radius=10)
+        draw_text(layer, f"FireRate (cost {self.upgrades['firerate']['cost']})", bx + bw//2, 24, center=True)
         bx += bw + pad
-        pygame.draw.rect(surf, GRAY, (bx, by, bw, 48), border_radius=10)
-        draw_text(surf, f"HP +1 (cost {self.upgrades['hp']['cost']})", bx + bw//2, by + 24, center=True)
+        pygame.draw.rect(layer, GRAY, (bx, 0, bw, 48), border_radius=10)
+        draw_text(layer, f"HP +1 (cost {self.upgrades['hp']['cost']})", bx + bw//2, 24, center=True)
+        return layer
 
-    def click_upgrade_area(self, pos):
-        mx,my = pos
+    def upgrade_at(self, pos):
+        """Upgrade key of the button under pos, or None."""
         pad = int(12*(WIDTH/480))
         bw = int((WIDTH - pad*5) / 3)
         bx = pad
@@ -524,124 +994,364 @@ class Game:
         r1 = pygame.Rect(bx, by, bw, 48)
         r2 = pygame.Rect(bx + bw + pad, by, bw, 48)
         r3 = pygame.Rect(bx + 2*(bw + pad), by, bw, 48)
-        if r1.collidepoint(pos):
-            self.purchase("power"); return True
-        if r2.collidepoint(pos):
-            self.purchase("firerate"); return True
-        if r3.collidepoint(pos):
-            self.purchase("hp"); return True
-        return False
+        if r1.collidepoint(pos): return "power"
+        if r2.collidepoint(pos): return "firerate"
+        if r3.collidepoint(pos): return "hp"
+        return None
+
+# ---------------- Menu / gameover screens ----------------
+def menu_buttons():
+    """(label, x, y, w, h) of the difficulty buttons."""
+    bw = int(110 * (WIDTH/480)); pad = int(20*(WIDTH/480))
+    x0 = WIDTH//2 - int(1.5*bw + pad)
+    ry = HEIGHT//2 + 20
+    return [(lab, x0 + i*(bw+pad), ry, bw, 56) for i, lab in enumerate(["Easy","Normal","Hard"])]
+
+def draw_menu(surf, game):
+    surf.fill((8,12,20))
+    draw_text(surf, "SKY DEFENDER (2.5D)", WIDTH//2, HEIGHT//4, BIG, WHITE, center=True)
+    draw_text(surf, "Tap a difficulty to start", WIDTH//2, HEIGHT//4 + 54, FONT, WHITE, center=True)
+    draw_text(surf, f"Highscore: {game.highscore}", WIDTH//2, HEIGHT//4 + 96, FONT, WHITE, center=True)
+    line_h = FONT.get_linesize()
+    for i, run in enumerate(SCORES.top(3)[1:]):
+        label = f"{i+2}. {run['score']}"
+        if "difficulty" in run:
+            label += f"  {run['difficulty']}  {int(run['duration_s'])//60}:{int(run['duration_s'])%60:02d}"
+        draw_text(surf, label, WIDTH//2, HEIGHT//4 + 96 + line_h*(i+1), FONT, WHITE, center=True)
+    # three buttons
+    for lab, rx, ry, bw, bh in menu_buttons():
+        surf.blit(SHAPES.get(("button", bw, bh), lambda: rect_sprite((30,30,40), bw, bh, 10)), (rx, ry))
+        draw_text(surf, lab, rx + bw//2, ry + bh//2, BIG, WHITE, center=True)
+    draw_text(surf, "Creator: @kawasakl_ninja", WIDTH - 220, HEIGHT - 40)
+
+def dim_overlay():
+    s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    s.fill((0,0,0,160))
+    return s
+
+def draw_gameover(surf, game):
+    # the frozen field at its last tick, dimmed
+    game.draw(surf)
+    surf.blit(SHAPES.get(("dim", WIDTH, HEIGHT), dim_overlay), (0,0))
+    draw_text(surf, "GAME OVER", WIDTH//2, HEIGHT//3, BIG, WHITE, center=True)
+    draw_text(surf, f"Score: {game.score}", WIDTH//2, HEIGHT//3 + 64, FONT, WHITE, center=True)
+    if game.rank:
+        draw_text(surf, f"#{game.rank} on the leaderboard", WIDTH//2, HEIGHT//3 + 88, FONT, YELLOW, center=True)
+    draw_text(surf, "Tap to return to menu", WIDTH//2, HEIGHT//3 + 110, FONT, WHITE, center=True)
+
+def draw_paused(surf, game):
+    game.draw(surf)
+    surf.blit(SHAPES.get(("dim", WIDTH, HEIGHT), dim_overlay), (0,0))
+    draw_text(surf, "PAUSED", WIDTH//2, HEIGHT//3, BIG, WHITE, center=True)
+    draw_text(surf, f"Score: {game.score}", WIDTH//2, HEIGHT//3 + 64, FONT, WHITE, center=True)
+    draw_text(surf, "Tap to resume", WIDTH//2, HEIGHT//3 + 110, FONT, WHITE, center=True)
 
 # ---------------- Main loop ----------------
-game = Game()
-# reduce music volume in menu if playing
-if MUSIC:
-    try:
-        pygame.mixer.music.set_volume(0.28)
-    except:
-        pass
-
-touch_pos = None
-shooting = False
-
-running = True
-while running:
-    dt = clock.tick(FPS)
-    for ev in pygame.event.get():
-        if ev.type == pygame.QUIT:
-            running = False
-        elif ev.type == pygame.MOUSEBUTTONDOWN:
-            mx,my = ev.pos
-            if game.state == "menu":
-                # menu buttons centered
-                bw = int(110 * (WIDTH/480)); pad = int(20*(WIDTH/480))
-                x0 = WIDTH//2 - int(1.5*bw + pad)
-                ry = HEIGHT//2 + 20
-                for i,lab in enumerate(["Easy","Normal","Hard"]):
-                    rx = x0 + i*(bw+pad)
-                    if rx <= mx <= rx + bw and ry <= my <= ry + 56:
-                        game.set_difficulty(lab)
-                        break
-            elif game.state == "playing":
-                # if click within upgrade area (we positioned it above bottom), use it
-                if my >= PLAY_H - int(56*(WIDTH/480)) - int(64*(WIDTH/480)):
-                    consumed = game.click_upgrade_area((mx,my))
-                    if not consumed:
-                        # toggle pause -> go to menu
-                        game.state = "menu"
-                        if MUSIC:
-                            try: pygame.mixer.music.set_volume(0.28)
-                            except: pass
-                else:
-                    shooting = True
-                    touch_pos = (mx,my)
-            elif game.state == "gameover":
-                # reset (complete reset including upgrades)
-                game = Game()
-                if MUSIC:
-                    try: pygame.mixer.music.set_volume(0.28)
-                    except: pass
-        elif ev.type == pygame.MOUSEBUTTONUP:
-            shooting = False
-            touch_pos = None
-        elif ev.type == pygame.MOUSEMOTION:
-            if pygame.mouse.get_pressed()[0]:
-                touch_pos = ev.pos
-        elif ev.type == pygame.KEYDOWN:
-            if ev.key == pygame.K_ESCAPE:
+def main(dirty_rects=False, profile_out=None, record_dir=None, quality="auto", resume=True, capture=None):
+    # the game only ever sees simulated time, in fixed SIM_STEP_MS ticks, so it
+    # plays at the same speed at any frame rate and a recording replays exactly
+    sim_clock = TickClock(SIM_STEP_MS)
+    acc = 0.0
+    game = Game(sim_clock)
+    recorder = None
+    # pick up the run the app was killed/backgrounded in
+    if resume and os.path.exists(SNAPSHOTS.path):
+        try:
+            data = snapshot.read(SNAPSHOTS.path)
+            hd = snapshot.header(data)
+            # positions are in render pixels: lay out at the scale the run was saved at
+            # (and, unless --quality fixes it, carry on in the tier the device had dropped to)
+            tier = next((t for t in TIERS if t["name"] == hd["quality"]), None)
+            if quality == "auto" and tier is not None and tier is not QUALITY:
+                apply_quality(tier)
+            if hd["render_scale"] != RENDER_SCALE:
+                set_render_scale(hd["render_scale"])
+            game = Game(sim_clock)
+            snapshot.load_into(game, data, WIDTH, HEIGHT)
+            game.resumed = True
+            game.state = "paused"       # nobody is touching the screen at launch: wait for a tap
+        except (OSError, ValueError, struct.error) as e:
+            print("Could not resume the last run:", e)
+            game = Game(sim_clock)
+            SNAPSHOTS.discard()
+    was_playing = game.state == "playing"
+    last_save = sim_clock.ticks()
+    # optional dirty-rect presenting while playing (menu/gameover flip when redrawn);
+    # the SDL2 renderer backend always redraws whole frames
+    dirty = DirtyRenderer((WIDTH, HEIGHT)) if dirty_rects and TEXTURES is None else None
+    overlay = None        # profiler overlay scratch surface (renderer backend)
+    # quality tiers: stepped by frame work time while playing, or fixed by --quality
+    names = [t["name"] for t in TIERS]
+    governor = QualityGovernor(1000.0 / (FPS or SIM_HZ), tier=names.index(QUALITY["name"]), auto=quality == "auto")
+    # reduce music volume in menu if playing
+    if MUSIC:
+        try:
+            pygame.mixer.music.set_volume(0.28)
+        except:
+            pass
+
+    touch_pos = None
+    shooting = False
+    purchases = []
+    # menu/gameover: sleep until input, redraw only when something changed
+    idle = IdleScreen(IDLE_FPS)
+
+    running = True
+    while running:
+        # dt only counts as game time if the whole frame was played: a tap that
+        # starts or resumes a run must not bring the idle wait along with it
+        ticking = game.state == "playing"
+        if ticking:
+            dt = clock.tick(FPS)
+            events = pygame.event.get()
+        else:
+            events = idle.wait()
+            dt = clock.tick()
+            idle.saw(events)
+        frame_t0 = time.perf_counter()
+        PROFILER.begin_frame()
+        if ASSET_LOADER.busy():
+            apply_deferred_assets(game.state == "playing")
+        for ev in events:
+            if ev.type in (pygame.QUIT, pygame.WINDOWCLOSE):
                 running = False
-            if ev.key == pygame.K_SPACE:
+            elif ev.type in (pygame.APP_WILLENTERBACKGROUND, pygame.WINDOWMINIMIZED, pygame.WINDOWFOCUSLOST):
+                # the OS may kill us from here on without another frame
+                if game.state == "playing":
+                    save_run(game)
+                    last_save = sim_clock.ticks()
+            elif ev.type == pygame.MOUSEBUTTONDOWN:
+                mx,my = to_screen(ev.pos)
                 if game.state == "menu":
-                    game.set_difficulty("Normal")
+                    # menu buttons centered
+                    for lab, rx, ry, bw, bh in menu_buttons():
+                        if rx <= mx <= rx + bw and ry <= my <= ry + bh:
+                            game.set_difficulty(lab)
+                            break
                 elif game.state == "playing":
-                    shooting = True
-            if ev.key == pygame.K_r and game.state == "gameover":
-                game = Game()
-        elif ev.type == pygame.KEYUP:
-            if ev.key == pygame.K_SPACE:
+                    # if click within upgrade area (we positioned it above bottom), use it
+                    if my >= PLAY_H - int(56*(WIDTH/480)) - int(64*(WIDTH/480)):
+                        key = game.upgrade_at((mx,my))
+                        if key:
+                            purchases.append(key)     # bought in game.step, so it's recorded
+                        else:
+                            # toggle pause -> go to menu
+                            game.state = "menu"
+                            if MUSIC:
+                                try: pygame.mixer.music.set_volume(0.28)
+                                except: pass
+                    else:
+                        shooting = True
+                        touch_pos = (mx,my)
+                elif game.state == "paused":
+                    game.state = "playing"
+                elif game.state == "gameover":
+                    # reset (complete reset including upgrades)
+                    game = Game(sim_clock)
+                    if MUSIC:
+                        try: pygame.mixer.music.set_volume(0.28)
+                        except: pass
+            elif ev.type == pygame.MOUSEBUTTONUP:
                 shooting = False
+                touch_pos = None
+            elif ev.type == pygame.MOUSEMOTION:
+                if pygame.mouse.get_pressed()[0]:
+                    touch_pos = to_screen(ev.pos)
+            elif ev.type == pygame.KEYDOWN:
+                if ev.key == pygame.K_ESCAPE:
+                    running = False
+                if ev.key == pygame.K_SPACE:
+                    if game.state == "menu":
+                        game.set_difficulty("Normal")
+                    elif game.state == "paused":
+                        game.state = "playing"
+                    elif game.state == "playing":
+                        shooting = True
+                if ev.key == pygame.K_r and game.state == "gameover":
+                    game = Game(sim_clock)
+                if ev.key == pygame.K_F3:
+                    # profiler overlay; starts recording the first time it's shown
+                    if not PROFILER.enabled:
+                        PROFILER.set_enabled(True)
+                    PROFILER.show = not PROFILER.show
+                    # the panel was drawn straight onto the screen: repaint all of it
+                    if dirty is not None:
+                        dirty.invalidate()
+                    idle.invalidate()
+            elif ev.type == pygame.KEYUP:
+                if ev.key == pygame.K_SPACE:
+                    shooting = False
 
-    # update
-    if game.state == "playing":
-        # move player toward touch position if available
-        if touch_pos:
-            mx,my = touch_pos
-            if my < PLAY_H:
-                game.player.move_toward(mx, my)
-        # auto-shoot when holding
-        if shooting and game.player.can_shoot():
-            new_bs = game.player.shoot()
-            game.bullets.extend(new_bs)
-        game.update()
-
-    # draw screen
-    if game.state == "menu":
-        screen.fill((8,12,20))
-        draw_text(screen, "SKY DEFENDER (2.5D)", WIDTH//2, HEIGHT//4, BIG, WHITE, center=True)
-        draw_text(screen, "Tap a difficulty to start", WIDTH//2, HEIGHT//4 + 54, FONT, WHITE, center=True)
-        draw_text(screen, f"Highscore: {game.highscore}", WIDTH//2, HEIGHT//4 + 96, FONT, WHITE, center=True)
-        # three buttons
-        bw = int(110 * (WIDTH/480)); pad = int(20*(WIDTH/480))
-        x0 = WIDTH//2 - int(1.5*bw + pad)
-        ry = HEIGHT//2 + 20
-        for i,lab in enumerate(["Easy","Normal","Hard"]):
-            rx = x0 + i*(bw+pad)
-            pygame.draw.rect(screen, (30,30,40), (rx, ry, bw, 56), border_radius=10)
-            draw_text(screen, lab, rx + bw//2, ry + 28, BIG, WHITE, center=True)
-        draw_text(screen, "Creator: @kawasakl_ninja", WIDTH - 220, HEIGHT - 40)
-    elif game.state == "playing":
-        game.draw(screen)
-    else:  # gameover
-        game.draw(screen)
-        # overlay
-        s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        s.fill((0,0,0,160))
-        screen.blit(s, (0,0))
-        draw_text(screen, "GAME OVER", WIDTH//2, HEIGHT//3, BIG, WHITE, center=True)
-        draw_text(screen, f"Score: {game.score}", WIDTH//2, HEIGHT//3 + 64, FONT, WHITE, center=True)
-        draw_text(screen, "Tap to return to menu", WIDTH//2, HEIGHT//3 + 110, FONT, WHITE, center=True)
+        PROFILER.lap("events")
 
-    pygame.display.flip()
+        # a lower internal resolution can only be switched to between runs
+        if game.state == "menu" and QUALITY["render_scale"] != RENDER_SCALE and not ASSET_LOADER.busy():
+            set_render_scale(QUALITY["render_scale"])
+            game = Game(sim_clock)
+            touch_pos = None; shooting = False
+            if dirty is not None:
+                dirty = DirtyRenderer((WIDTH, HEIGHT))
+            idle.invalidate()
+
+        # recording covers one run: from set_difficulty until it leaves "playing"
+        if recorder is not None and (game.state != "playing" or recorder.seed != game.seed):
+            recorder.close(game)
+            print("recording written to", recorder.path)
+            recorder = None
+        if record_dir and recorder is None and game.state == "playing" and not game.resumed:
+            recorder = replay.Recorder(replay.new_path(record_dir), game, WIDTH, HEIGHT)
+
+        # update: whole fixed steps for the time that passed, the remainder is
+        # carried over and used to interpolate the drawing between the last two ticks.
+        # The menu/gameover screens don't simulate anything.
+        acc = acc + min(dt, 250) if ticking and game.state == "playing" else 0.0
+        steps = 0
+        while acc >= SIM_STEP_MS and steps < MAX_CATCHUP:
+            inputs = FrameInput(touch_pos, shooting, tuple(purchases))
+            purchases.clear()      # bought once, on the first tick of the frame
+            if recorder is not None:
+                recorder.record(inputs)
+            game.step(inputs, SIM_STEP_MS)
+            acc -= SIM_STEP_MS
+            steps += 1
+        if acc >= SIM_STEP_MS:
+            acc %= SIM_STEP_MS     # too far behind: drop the backlog (slow down) instead of spiralling
+        alpha = acc / SIM_STEP_MS
+
+        # snapshot the run when it starts or pauses and every AUTOSAVE_MS; a
+        # finished run has nothing to resume. Only the packing runs here.
+        playing = game.state == "playing"
+        if playing != was_playing or (playing and sim_clock.ticks() - last_save >= AUTOSAVE_MS):
+            if game.state == "gameover":
+                SNAPSHOTS.discard()
+            else:
+                save_run(game)
+            last_save = sim_clock.ticks()
+            was_playing = playing
+        PROFILER.lap("snapshot")
+
+        # draw screen
+        redrawn = True
+        if game.state == "playing":
+            idle.leave()
+            game.draw(screen, dirty if screen is DISPLAY else None, alpha)
+        else:
+            key = (game.state, id(game), game.score, game.highscore, game.rank, len(IMG_BG_LAYERS),
+                   screen.get_size())
+            redrawn = idle.needs_redraw(key)
+            if redrawn:
+                if game.state == "menu":
+                    draw_menu(screen, game)
+                elif game.state == "paused":
+                    draw_paused(screen, game)
+                else:
+                    draw_gameover(screen, game)
+                idle.store(screen, key)
+            elif PROFILER.show:
+                idle.restore(screen)     # the overlay below changes every frame
+        PROFILER.lap("draw_screens")
+
+        if PROFILER.show:
+            stats = SPRITES.stats()
+            mix = SOUNDS.stats()
+            extra = [f"enemies {len(game.enemies)}  bullets {len(game.bullets)}  particles {len(game.particles)}",
+                     f"sprite cache hit {stats['hit_rate']:.0%} ({stats['entries']} entries)",
+                     f"voices {mix['active']}/{mix['channels']}  played {mix['played']}",
+                     f"limited {mix['throttled'] + mix['capped']}  stolen {mix['stolen']}  dropped {mix['dropped']}",
+                     f"quality {QUALITY['name']} ({'auto' if governor.auto else 'fixed'}, {governor.changes} changes)"
+                     f"  p90 {governor.last_p90:.1f} ms"]
+            if capture is not None:
+                cap = capture.stats()
+                extra.append(f"capture {cap['written']} written  {cap['dropped']} dropped  "
+                             f"grab {cap['grab_ms']:.2f} ms (max {cap['grab_max_ms']:.1f})"
+                             + ("  STOPPED" if cap["stopped"] else ""))
+            if screen is TEXTURES:
+                # the overlay draws lines: compose it on a scratch surface and upload that
+                if overlay is None or overlay.get_width() != WIDTH:
+                    overlay = pygame.Surface((WIDTH, HEIGHT // 2)).convert()
+                panel = PROFILER.draw_overlay(overlay, FONT, extra=extra)
+                TEXTURES.changed(overlay)
+                screen.blit(overlay, panel.topleft, panel)
+            else:
+                panel = PROFILER.draw_overlay(screen, FONT, extra=extra)
+            if dirty is not None and game.state == "playing" and screen is DISPLAY:
+                pygame.display.update(panel)
+            PROFILER.lap("overlay")
+
+        if game.state == "playing":
+            if governor.sample((time.perf_counter() - frame_t0) * 1000.0):
+                apply_quality(governor.settings, game)
+                if dirty is not None:
+                    dirty.invalidate()
+        else:
+            governor.reset_window()
+
+        if redrawn or PROFILER.show:     # else idle and unchanged: the display already shows it
+            if capture is not None and screen is TEXTURES:
+                capture.grab(screen)     # a renderer's back buffer is undefined after present
+                PROFILER.lap("capture")
+            if dirty is None or screen is not DISPLAY:
+                present_screen()
+            elif game.state != "playing":
+                pygame.display.flip()
+                dirty.invalidate()
+            if capture is not None and screen is not TEXTURES:
+                PROFILER.lap("present")
+                capture.grab(screen)
+                PROFILER.lap("capture")
+        PROFILER.lap("present")
+        PROFILER.end_frame(game.counts, dt)
+
+    if recorder is not None:
+        recorder.close(game)
+        print("recording written to", recorder.path)
+    if game.state in ("playing", "paused"):
+        save_run(game)
+    SNAPSHOTS.close()
+    SCORES.close()
+    if capture is not None:
+        capture.close()
+        print("capture:", capture.summary())
+    if profile_out and PROFILER.recorded:
+        PROFILER.export(profile_out)
+        print("profile written to", profile_out + ".csv/.json")
+
+    pygame.quit()
+    sys.exit()
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sky Defender 2.5D")
+    ap.add_argument("--dirty-rects", action="store_true",
+                    help="update only changed screen areas instead of flipping every frame")
+    ap.add_argument("--profile", action="store_true",
+                    help="record per-phase frame timings and show the overlay (F3 toggles it)")
+    ap.add_argument("--profile-out", default="profile",
+                    help="file prefix for the CSV/JSON profile written on exit (default: profile)")
+    ap.add_argument("--fps", type=int, default=FPS,
+                    help=f"render rate cap, 0 = uncapped; the simulation always runs at {SIM_HZ} Hz (default: {FPS})")
+    ap.add_argument("--quality", default="auto", choices=["auto"] + [t["name"] for t in TIERS],
+                    help="quality tier, or auto to follow the frame-time budget (default: auto)")
+    ap.add_argument("--backend", default="surface", choices=["surface", "sdl2"],
+                    help="draw with software Surface blits, or through an SDL2 Renderer with textures (default: surface)")
+    ap.add_argument("--software-renderer", action="store_true",
+                    help="with --backend sdl2, use SDL's software renderer instead of the GPU")
+    ap.add_argument("--record", metavar="DIR",
+                    help="write each run's inputs to DIR/run-*.skyrec (play back with replay.py)")
+    ap.add_argument("--capture", metavar="DIR",
+                    help="save every presented frame under DIR (frames are dropped, not waited for, "
+                         "when the writer falls behind)")
+    ap.add_argument("--capture-format", default="png", choices=["png", "raw"],
+                    help="PNG sequence, or one raw .skyframes file (cheaper; convert with capture.py)")
+    ap.add_argument("--no-resume", action="store_true",
+                    help="start at the menu instead of resuming the run saved in run.skysnap")
+    args = ap.parse_args()
+    FPS = args.fps
+    if args.quality != "auto":
+        QUALITY = next(t for t in TIERS if t["name"] == args.quality)
+    setup(render_scale=QUALITY["render_scale"], backend=args.backend, software=args.software_renderer)
+    if args.profile:
+        PROFILER.set_enabled(True)
+        PROFILER.show = True
+    main(dirty_rects=args.dirty_rects, profile_out=args.profile_out if args.profile else None,
+         record_dir=args.record, quality=args.quality, resume=not args.no_resume,
+         capture=FrameCapture(args.capture, args.capture_format) if args.capture else None)
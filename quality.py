@@ -0,0 +1,79 @@
+# quality.py
+# Frame-budget driven quality tiers.
+#
+# The governor is fed each frame's work time (events + update + draw, not the
+# clock.tick sleep) and looks at the 90th percentile over a window of frames:
+#   p90 > budget * down   -> one tier lower, right away
+#   p90 < budget * up     -> one tier higher, but only after `up_windows`
+#                            windows in a row (hysteresis against flapping)
+# The window after a change is discarded: caches refill at the new settings.
+
+import numpy as np
+
+# best first; what each tier turns down is read by apply_quality() in the game
+TIERS = (
+    {"name": "high",   "particles": 1.0,  "smooth": True,  "bg_layers": 3, "stars": 1.0,  "render_scale": 1.0},
+    {"name": "medium", "particles": 0.6,  "smooth": True,  "bg_layers": 2, "stars": 0.75, "render_scale": 1.0},
+    {"name": "low",    "particles": 0.35, "smooth": False, "bg_layers": 1, "stars": 0.5,  "render_scale": 1.0},
+    {"name": "lowest", "particles": 0.2,  "smooth": False, "bg_layers": 1, "stars": 0.35, "render_scale": 0.75},
+)
+
+class QualityGovernor:
+    def __init__(self, budget_ms, tiers=TIERS, tier=0, window=90, down=0.9, up=0.55, up_windows=3,
+                 auto=True):
+        self.budget_ms = budget_ms
+        self.tiers = tiers
+        self.tier = tier
+        self.window = window
+        self.down = down
+        self.up = up
+        self.up_windows = up_windows
+        self.auto = auto           # False: stay on the tier it was given
+        self.samples = np.zeros(window)
+        self.n = 0
+        self.calm = 0              # consecutive windows with headroom
+        self.skip = False          # drop the window right after a change
+        self.changes = 0
+        self.last_p90 = 0.0
+
+    @property
+    def settings(self):
+        return self.tiers[self.tier]
+
+    def sample(self, work_ms):
+        """Record one frame; returns True when the tier changed."""
+        if not self.auto:
+            return False
+        self.samples[self.n] = work_ms
+        self.n += 1
+        if self.n < self.window:
+            return False
+        self.n = 0
+        if self.skip:
+            self.skip = False
+            return False
+        p90 = self.last_p90 = float(np.percentile(self.samples, 90))
+        if p90 > self.budget_ms * self.down and self.tier < len(self.tiers) - 1:
+            return self.set_tier(self.tier + 1)
+        if p90 < self.budget_ms * self.up and self.tier > 0:
+            self.calm += 1
+            if self.calm >= self.up_windows:
+                return self.set_tier(self.tier - 1)
+        else:
+            self.calm = 0
+        return False
+
+    def set_tier(self, tier):
+        tier = max(0, min(len(self.tiers) - 1, tier))
+        if tier == self.tier:
+            return False
+        self.tier = tier
+        self.calm = 0
+        self.n = 0
+        self.skip = True
+        self.changes += 1
+        return True
+
+    def reset_window(self):
+        """Forget the partial window (e.g. after a pause or a loading hitch)."""
+        self.n = 0
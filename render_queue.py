@@ -0,0 +1,100 @@
+# render_queue.py
+# Batched sprite submission: entities queue (surface, position) pairs into
+# layers during Game.draw, and flush() hands each layer to one Surface.blits
+# call instead of one blit/draw call per entity.
+#
+# Layers are flushed in the order they were declared. An "ordered" layer keeps
+# submission order (enemies: far-to-near, each sprite followed by its HP bar);
+# the others are grouped by surface, which is free to reorder because their
+# sprites are identical wherever they overlap. Ordered layers keep what
+# extend() was given as runs and chain them into blits, so a lazy iterable
+# (particles: thousands of pairs) is never materialized into a list.
+#
+# Shapes that used to be drawn with pygame.draw every frame (bullets, powerups,
+# HP bars) come pre-rendered from a ShapeCache.
+
+from itertools import chain
+import pygame
+
+KEY = (255, 0, 255)   # colorkey of the pre-rendered shapes
+
+class RenderQueue:
+    def __init__(self):
+        self.layers = []          # [name, ordered, [runs] or {surface: [pos]}, track]
+        self._by_name = {}
+
+    def add_layer(self, name, ordered=False, track=True):
+        """track=False: flush() doesn't report the layer's rects (the caller
+        covers it with one bounding rect, e.g. particles)."""
+        self._by_name[name] = len(self.layers)
+        self.layers.append([name, ordered, [] if ordered else {}, track])
+
+    def extend(self, name, pairs):
+        """Queue many (surface, pos) pairs at once; an ordered layer keeps
+        `pairs` as it is until flush()."""
+        _, ordered, items, _ = self.layers[self._by_name[name]]
+        if ordered:
+            items.append(pairs)
+        else:
+            for surf, pos in pairs:
+                items.setdefault(surf, []).append(pos)
+
+    def flush(self, target, rects=None):
+        """Blit every layer onto `target` and empty the queue. With a `rects`
+        list, the rects of tracked layers are appended to it."""
+        for _, ordered, items, track in self.layers:
+            if not items:
+                continue
+            if ordered:
+                seq = items[0] if len(items) == 1 else chain.from_iterable(items)
+            else:
+                seq = [(surf, pos) for surf, group in items.items() for pos in group]
+            if rects is not None and track:
+                rects.extend(target.blits(seq))
+            else:
+                target.blits(seq, doreturn=False)
+            items.clear()
+
+class ShapeCache:
+    """Pre-rendered shapes keyed by whatever determines their pixels.
+
+    get(key, build) returns build()'s surface, built once per key. The shapes
+    are small and few (one per bullet radius, powerup kind, HP bar width), so
+    there's no eviction; clear() after a layout change.
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, build):
+        surf = self.entries.get(key)
+        if surf is None:
+            surf = self.entries[key] = build()
+        return surf
+
+    def clear(self):
+        self.entries.clear()
+
+def shape_surface(w, h):
+    surf = pygame.Surface((max(1, w), max(1, h)))
+    surf.fill(KEY)
+    surf.set_colorkey(KEY, pygame.RLEACCEL)
+    return surf
+
+def circle_sprite(color, r):
+    """pygame.draw.circle(color, r) as a sprite; blit it at (cx - r, cy - r)."""
+    surf = shape_surface(r*2 + 1, r*2 + 1)
+    pygame.draw.circle(surf, color, (r, r), r)
+    return surf
+
+def rect_sprite(color, w, h, border_radius=0):
+    surf = shape_surface(w, h)
+    pygame.draw.rect(surf, color, (0, 0, w, h), border_radius=border_radius)
+    return surf
+
+def bar_sprite(back, front, w, h, fill):
+    """Progress bar w x h with its first `fill` pixels in `front`."""
+    surf = pygame.Surface((max(1, w), max(1, h)))
+    surf.fill(back)
+    if fill > 0:
+        surf.fill(front, (0, 0, fill, h))
+    return surf
@@ -0,0 +1,144 @@
+# replay.py
+# Compact binary recording of a run's per-tick inputs, and replay.
+#
+# A run is deterministic given its seed, the clock value it started at, the
+# fixed simulation step, and for every tick: the touch point, shooting, and
+# upgrade purchases. That is all a recording holds (5 bytes per tick, so a
+# 30 minute session at 60 Hz is ~540 KB).
+#
+#   python "python space_2_5d_mobile.py" --record recordings/
+#   python replay.py recordings/run-20261016-201500.skyrec            # uncapped, no rendering
+#   python replay.py recordings/run-20261016-201500.skyrec --realtime # watch it at recorded speed
+#
+# File layout (little endian):
+#   header  "SKYR" u16 version, i64 seed, f64 start_ms, f64 step_ms, 8s difficulty, u16 width,
+#           u16 height, u32 cost + u32 level per upgrade (costs carry over when a run is restarted
+#           from the menu)
+#   ticks   i16 touch_x, i16 touch_y, u8 flags      (repeated, one per simulation step)
+#   trailer i16 -32768, i16 0, u8 0, u32 ticks, i64 final score   (missing if the game crashed)
+
+import argparse, os, struct, sys, time
+
+MAGIC = b"SKYR"
+VERSION = 2
+HEADER = struct.Struct("<4sHqdd8sHH6I")
+UPGRADES = ("power", "firerate", "hp")
+TICK = struct.Struct("<hhB")
+TRAILER = struct.Struct("<Iq")
+END = -32768          # touch_x of the trailer marker
+
+SHOOTING = 1
+TOUCH = 2
+PURCHASE_BITS = {"power": 4, "firerate": 8, "hp": 16}
+
+class Recorder:
+    """Streams one run's inputs to `path`; start it right after set_difficulty()."""
+    def __init__(self, path, game, width, height):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.seed = game.seed
+        self.ticks = 0
+        self.f = open(path, "wb")
+        up = []
+        for key in UPGRADES:
+            up += [game.upgrades[key]["cost"], game.upgrades[key]["level"]]
+        self.f.write(HEADER.pack(MAGIC, VERSION, game.seed, game.clock.ms, game.clock.step_ms,
+                                 game.difficulty.encode()[:8], width, height, *up))
+
+    def record(self, inputs):
+        flags = SHOOTING if inputs.shooting else 0
+        x = y = 0
+        if inputs.touch_pos:
+            flags |= TOUCH
+            x, y = inputs.touch_pos
+        for key in inputs.purchases:
+            flags |= PURCHASE_BITS.get(key, 0)
+        self.f.write(TICK.pack(int(x), int(y), flags))
+        self.ticks += 1
+        if self.ticks % 600 == 0:
+            self.f.flush()      # a crash loses at most ~10 s of input
+
+    def close(self, game):
+        self.f.write(TICK.pack(END, 0, 0))
+        self.f.write(TRAILER.pack(self.ticks, game.score))
+        self.f.close()
+
+def new_path(directory):
+    return os.path.join(directory, time.strftime("run-%Y%m%d-%H%M%S.skyrec"))
+
+def load(path):
+    """(header dict, [(touch_pos, shooting, purchases)], trailer dict or None)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, start_ms, step_ms, diff, w, h, *up = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a v{VERSION} recording")
+    header = {"seed": seed, "start_ms": start_ms, "step_ms": step_ms, "difficulty": diff.rstrip(b"\0").decode(),
+              "width": w, "height": h,
+              "upgrades": {key: {"cost": up[2*i], "level": up[2*i+1]} for i, key in enumerate(UPGRADES)}}
+    keys = tuple(PURCHASE_BITS.items())
+    ticks = []
+    trailer = None
+    off = HEADER.size
+    while off + TICK.size <= len(data):
+        x, y, flags = TICK.unpack_from(data, off)
+        off += TICK.size
+        if x == END:
+            if off + TRAILER.size <= len(data):
+                n, score = TRAILER.unpack_from(data, off)
+                trailer = {"ticks": n, "score": score}
+            break
+        ticks.append(((x, y) if flags & TOUCH else None, bool(flags & SHOOTING),
+                      tuple(k for k, bit in keys if flags & bit)))
+    return header, ticks, trailer
+
+def replay(sky, path, render=False, realtime=False):
+    """Play a recording back against the game module `sky`; returns the Game."""
+    header, ticks, _ = load(path)
+    step_ms = header["step_ms"]
+    g = sky.Game(sky.TickClock(step_ms, start_ms=header["start_ms"]))
+    g.save_scores = False
+    g.set_difficulty(header["difficulty"], seed=header["seed"])
+    g.upgrades = header["upgrades"]
+    t_next = time.perf_counter()
+    for touch, shooting, purchases in ticks:
+        g.step(sky.FrameInput(touch, shooting, purchases))
+        if render:
+            g.draw(sky.screen)
+            sky.pygame.display.flip()
+            sky.pygame.event.pump()
+        if realtime:
+            t_next += step_ms / 1000.0
+            pause = t_next - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+    return g
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a Sky Defender input recording")
+    ap.add_argument("recording")
+    ap.add_argument("--realtime", action="store_true", help="open a window and play at recorded speed")
+    args = ap.parse_args()
+
+    import headless
+    header, ticks, trailer = load(args.recording)
+    size = (header["width"], header["height"])
+    if args.realtime:
+        sky = headless.import_game()
+        sky.setup(size=size)
+    else:
+        sky = headless.load_game(size)
+    t = time.perf_counter()
+    g = replay(sky, args.recording, render=args.realtime, realtime=args.realtime)
+    secs = time.perf_counter() - t
+    game_secs = len(ticks) * header["step_ms"] / 1000.0
+    print(f"{len(ticks)} ticks ({game_secs/60:.1f} min of play) replayed in {secs:.2f} s; "
+          f"state={g.state} score={g.score}")
+    if trailer:
+        ok = trailer["ticks"] == len(ticks) and trailer["score"] == g.score
+        print("matches recording" if ok else f"MISMATCH: recorded score {trailer['score']}")
+        if not ok:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# scores.py
+# Top-N score store: nothing touches the disk on the game thread.
+#
+#   SCORES = ScoreStore("scores.json", legacy="highscore.txt")
+#   SCORES.best()                                   # loads on first use
+#   rank = SCORES.submit(42, difficulty="Hard", duration_s=95.2, upgrades={...})
+#   SCORES.close()                                  # on exit: drain the writer
+#
+#   python scores.py check       # crash-recovery checks in a scratch directory
+#
+# Each submitted run is appended to <path>.journal by a writer thread as one
+# JSON line, fsync'd before the next one, so a finished run survives kill -9
+# (a torn last line is skipped on load, and the next run starts on a fresh
+# line after it). Every `compact_every` runs, and on
+# close(), the top-N list is written to <path>.tmp, fsync'd and renamed over
+# <path>, then the journal is emptied. Runs carry an id, so a crash between
+# the rename and the truncate only replays runs that are already counted.
+# A legacy highscore.txt (one integer) is merged in as a run with no metadata.
+
+import argparse, json, os, queue, sys, tempfile, threading, time
+
+class ScoreStore:
+    def __init__(self, path="scores.json", legacy=None, keep=10, compact_every=16):
+        self.path = path
+        self.journal = path + ".journal"
+        self.legacy = legacy
+        self.keep = keep
+        self.compact_every = compact_every
+        self.runs = None           # top-N, best first; None until loaded
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+        self._journaled = 0        # journal lines since the last compaction
+        self._torn = False         # the journal ends in a partial line
+
+    # ---------------- reading ----------------
+    def _load(self):
+        runs = []
+        try:
+            with open(self.path) as f:
+                runs = json.load(f)["runs"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("Score file unreadable, starting from the journal:", self.path, e)
+        try:
+            with open(self.journal) as f:
+                for line in f:
+                    # a crash mid-write leaves a last line with no newline; the
+                    # next append starts a fresh line so it isn't glued onto it
+                    self._torn = not line.endswith("\n")
+                    try:
+                        runs.append(json.loads(line))
+                        self._journaled += 1
+                    except ValueError:
+                        pass         # torn write from a crash
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print("Score journal unreadable:", self.journal, e)
+        if self.legacy:
+            try:
+                with open(self.legacy) as f:
+                    v = int(f.read().strip() or "0")
+                if v > 0:
+                    runs.append({"id": "legacy", "score": v})
+            except (OSError, ValueError):
+                pass
+        self.runs = self._top(runs)
+
+    def _top(self, runs):
+        seen = {}
+        for r in runs:
+            if isinstance(r, dict) and "score" in r:
+                seen.setdefault(r.get("id"), r)
+        # stable: equal scores keep the earlier run first
+        return sorted(seen.values(), key=lambda r: -r["score"])[:self.keep]
+
+    def _ensure(self):
+        with self.lock:
+            if self.runs is None:
+                self._load()
+            return self.runs
+
+    def top(self, n=None):
+        runs = self._ensure()
+        return list(runs if n is None else runs[:n])
+
+    def best(self):
+        runs = self._ensure()
+        return runs[0]["score"] if runs else 0
+
+    # ---------------- writing ----------------
+    def submit(self, score, **meta):
+        """Record a finished run; returns its 1-based rank, or None if it missed the top N."""
+        run = {"id": f"{time.time_ns():x}", "score": int(score), "when": int(time.time())}
+        run.update(meta)
+        runs = self._ensure()
+        with self.lock:
+            self.runs = self._top(runs + [run])
+            rank = next((i + 1 for i, r in enumerate(self.runs) if r is run), None)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, name="score-writer", daemon=True)
+            self.thread.start()
+        self.queue.put(run)
+        return rank
+
+    def close(self, timeout=2.0):
+        """Write everything queued and compact; call once on exit."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _writer(self):
+        while True:
+            run = self.queue.get()
+            try:
+                if run is None:
+                    if self._journaled:
+                        self._compact()
+                    return
+                self._append(run)
+                if self._journaled >= self.compact_every:
+                    self._compact()
+            except OSError as e:
+                print("Score write failed:", e)
+
+    def _append(self, run):
+        data = (json.dumps(run, separators=(",", ":")) + "\n").encode()
+        if self._torn:
+            data = b"\n" + data
+        fd = os.open(self.journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._torn = False
+        self._journaled += 1
+
+    def _compact(self):
+        with self.lock:
+            snapshot = {"version": 1, "runs": list(self.runs)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        with open(self.journal, "w"):
+            pass
+        self._journaled = 0
+        self._torn = False
+
+# ---------------- checks ----------------
+def check():
+    """Simulate the crashes the journal has to survive; returns the failures."""
+    failures = []
+    def expect(name, got, want):
+        print(f"{name:<40} {'ok' if got == want else f'FAILED: {got} != {want}'}")
+        if got != want:
+            failures.append(name)
+    def scores(path):
+        return [r["score"] for r in ScoreStore(path).top()]
+    def crash_after(path, *values):
+        # submit, let the writer journal everything, then "die" before compacting
+        s = ScoreStore(path)
+        s._compact = lambda: None
+        for v in values:
+            s.submit(v)
+        s.close()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "scores.json")
+        crash_after(path, 90, 80, 60)
+        expect("journal replays after a crash", scores(path), [90, 80, 60])
+
+        with open(path + ".journal", "a") as f:
+            f.write('{"id":"x","sco')  # killed mid-write
+        expect("torn last line is skipped", scores(path), [90, 80, 60])
+        crash_after(path, 100)
+        expect("run after a torn line survives", scores(path), [100, 90, 80, 60])
+
+        s = ScoreStore(path)
+        s.submit(70)
+        s.close()
+        expect("compaction keeps every run", scores(path), [100, 90, 80, 70, 60])
+        expect("compaction empties the journal", os.path.getsize(path + ".journal"), 0)
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser(description="Score store tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("check", help="run crash-recovery checks in a scratch directory")
+    ap.parse_args()
+    if check():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
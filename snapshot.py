@@ -0,0 +1,304 @@
+# snapshot.py
+# Binary snapshot of an in-progress run, for resuming after the app is
+# backgrounded or killed, and for loading benchmark fixtures.
+#
+#   data = snapshot.dumps(game, WIDTH, HEIGHT, RENDER_SCALE, QUALITY["name"])  # frame thread: ~0.1 ms
+#   SNAPSHOTS = snapshot.SnapshotWriter("run.skysnap")
+#   SNAPSHOTS.save(data)                              # tmp + fsync + rename on a writer thread
+#   snapshot.load_into(game, snapshot.read("run.skysnap"), WIDTH, HEIGHT)
+#
+#   python snapshot.py info run.skysnap
+#   python snapshot.py fixture bench.skysnap --enemies 2000 --bullets 800 --particles 6000
+#
+# Timers are stored relative to the clock (time left until the next spawn,
+# ms since the last shot, seconds of multi-shot left), so a run resumes on a
+# wall clock that has moved on. A TickClock is also set back to the saved sim
+# time, which makes the resumed run tick-for-tick identical. Positions are in
+# render pixels, so the render scale (and quality tier) the run was laid out at
+# is saved too: the game switches to it before loading.
+#
+# File layout (little endian):
+#   header    "SKYS" u16 version, u16 width, u16 height, f64 render_scale, 8s quality tier,
+#             f64 clock_ms (-1: wall clock), i64 seed, 8s difficulty, i64 score, i64 spawn_left_ms, i64 elapsed_ms, i64 spawn_interval_ms,
+#             f64 enemy_hp_mul, f64 enemy_speed_mul, f64 boss_chance, i32 points_per_kill,
+#             u32 cost + u32 level per upgrade
+#   player    f64 x, y, px, py, tilt, multi_left_s; i64 since_shot_ms; i32 hp, weapon_level,
+#             shot_cool, damage
+#   rng       u32 x 625 (random.Random state), f64 gauss_next (NaN = none),
+#             u64 x 4 particle PCG64 state/inc (lo, hi), u32 has_uint32, u32 uinteger
+#   counts    u32 bullets, powerups, enemies, particles; u16 palette colors
+#   arrays    bullets: f64 x, y, vy, i32 damage; powerups: f64 x, y, u8 kind;
+#             enemies: every EnemyManager.FIELDS array then order (i64);
+#             particles: x, y, vx, vy (f32), life (i16), size, color (u8); palette: u8 rgb
+
+import argparse, math, os, queue, struct, threading
+import numpy as np
+from particles import ParticleBuffer
+
+MAGIC = b"SKYS"
+VERSION = 2
+UPGRADES = ("power", "firerate", "hp")
+POWERUP_KINDS = ("hp", "multi")
+HEADER = struct.Struct("<4sHHHd8sdq8sqqqqdddi6I")
+PLAYER = struct.Struct("<6dq4i")
+RNG = struct.Struct("<625Id4QII")
+COUNTS = struct.Struct("<4IH")
+MASK64 = (1 << 64) - 1
+
+def dumps(game, width, height, render_scale=1.0, quality=""):
+    """The run in `game` as bytes (cheap enough for the frame thread)."""
+    clock = game.clock
+    now = clock.ticks()
+    t = clock.time()
+    p = game.player
+    up = []
+    for key in UPGRADES:
+        up += [game.upgrades[key]["cost"], game.upgrades[key]["level"]]
+    parts = [HEADER.pack(MAGIC, VERSION, width, height, render_scale, quality.encode()[:8],
+                         getattr(clock, "ms", -1.0), game.seed,
+                         game.difficulty.encode()[:8], game.score,
+                         game.spawn_timer + game.spawn_interval_ms - now, now - game.start_time,
+                         game.spawn_interval_ms, game.enemy_hp_mul, game.enemy_speed_mul, game.boss_chance,
+                         game.points_per_kill, *up),
+             PLAYER.pack(p.x, p.y, p.px, p.py, p.tilt, max(0.0, p.temp_multi_until - t), now - p.last_shot,
+                         p.hp, p.weapon_level, p.shot_cool, p.damage)]
+
+    _, mt, gauss = game.rng.getstate()
+    st = game.particles.rng.bit_generator.state
+    s, inc = st["state"]["state"], st["state"]["inc"]
+    parts.append(RNG.pack(*mt, math.nan if gauss is None else gauss,
+                          s & MASK64, s >> 64, inc & MASK64, inc >> 64, st["has_uint32"], st["uinteger"]))
+
+    bullets, powerups, en, pb = game.bullets, game.powerups, game.enemies, game.particles
+    parts.append(COUNTS.pack(len(bullets), len(powerups), en.n, pb.n, len(pb.palette)))
+    parts.append(np.array([b.x for b in bullets], "<f8").tobytes())
+    parts.append(np.array([b.y for b in bullets], "<f8").tobytes())
+    parts.append(np.array([b.vy for b in bullets], "<f8").tobytes())
+    parts.append(np.array([b.damage for b in bullets], "<i4").tobytes())
+    parts.append(np.array([pu.x for pu in powerups], "<f8").tobytes())
+    parts.append(np.array([pu.y for pu in powerups], "<f8").tobytes())
+    parts.append(np.array([POWERUP_KINDS.index(pu.kind) for pu in powerups], "u1").tobytes())
+    n = en.n
+    for name, dtype in en.FIELDS:
+        parts.append(getattr(en, name)[:n].astype(np.dtype(dtype).newbyteorder("<"), copy=False).tobytes())
+    parts.append(en.order.astype("<i8").tobytes())
+    n = pb.n
+    for arr in (pb.x, pb.y, pb.vx, pb.vy, pb.life, pb.size, pb.color):
+        parts.append(arr[:n].astype(arr.dtype.newbyteorder("<"), copy=False).tobytes())
+    parts.append(np.array(pb.palette, "u1").tobytes())
+    return b"".join(parts)
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def header(data):
+    """The header fields of a snapshot as a dict (ValueError if it isn't one)."""
+    if len(data) < HEADER.size:
+        raise ValueError("snapshot truncated")
+    (magic, version, w, h, render_scale, quality, clock_ms, seed, diff, score, spawn_left, elapsed,
+     interval, hp_mul, speed_mul, boss_chance, ppk, *up) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a v{VERSION} snapshot")
+    return {"width": w, "height": h, "render_scale": render_scale,
+            "quality": quality.rstrip(b"\0").decode(), "clock_ms": clock_ms, "seed": seed,
+            "difficulty": diff.rstrip(b"\0").decode(), "score": score, "spawn_left_ms": spawn_left,
+            "elapsed_ms": elapsed, "spawn_interval_ms": interval, "enemy_hp_mul": hp_mul,
+            "enemy_speed_mul": speed_mul, "boss_chance": boss_chance, "points_per_kill": ppk,
+            "upgrades": {key: {"cost": up[2*i], "level": up[2*i+1]} for i, key in enumerate(UPGRADES)}}
+
+def load_into(game, data, width, height):
+    """Replace the run in `game` with the snapshot `data` and set it playing."""
+    hd = header(data)
+    if (hd["width"], hd["height"]) != (width, height):
+        raise ValueError(f"snapshot is for {hd['width']}x{hd['height']}, not {width}x{height}")
+    clock = game.clock
+    if hd["clock_ms"] >= 0 and hasattr(clock, "ms"):
+        clock.ms = hd["clock_ms"]
+    game.difficulty = hd["difficulty"]
+    game.enemy_hp_mul = hd["enemy_hp_mul"]; game.enemy_speed_mul = hd["enemy_speed_mul"]
+    game.boss_chance = hd["boss_chance"]; game.points_per_kill = hd["points_per_kill"]
+    game.start_game(hd["seed"])         # fresh player, pools back, state "playing"
+    now = clock.ticks()
+    t = clock.time()
+    game.score = hd["score"]
+    game.spawn_interval_ms = hd["spawn_interval_ms"]
+    game.spawn_timer = now + hd["spawn_left_ms"] - hd["spawn_interval_ms"]
+    game.start_time = now - hd["elapsed_ms"]
+    game.upgrades = hd["upgrades"]
+    off = HEADER.size
+
+    p = game.player
+    p.x, p.y, p.px, p.py, p.tilt, multi_left, since_shot, p.hp, p.weapon_level, p.shot_cool, p.damage = \
+        PLAYER.unpack_from(data, off)
+    p.temp_multi_until = t + multi_left if multi_left > 0 else 0
+    p.last_shot = now - since_shot
+    off += PLAYER.size
+
+    *mt, gauss, s_lo, s_hi, i_lo, i_hi, has32, uint = RNG.unpack_from(data, off)
+    game.rng.setstate((3, tuple(mt), None if math.isnan(gauss) else gauss))
+    game.particles.rng.bit_generator.state = {
+        "bit_generator": "PCG64", "state": {"state": s_lo | s_hi << 64, "inc": i_lo | i_hi << 64},
+        "has_uint32": has32, "uinteger": uint}
+    off += RNG.size
+
+    nb, npu, ne, npart, ncol = COUNTS.unpack_from(data, off)
+    off += COUNTS.size
+    def take(dtype, n):
+        nonlocal off
+        dt = np.dtype(dtype).newbyteorder("<")
+        arr = np.frombuffer(data, dt, n, off)
+        off += n * dt.itemsize
+        return arr
+
+    bx, by, bvy, bdmg = take("f8", nb), take("f8", nb), take("f8", nb), take("i4", nb)
+    new = game.bullet_pool.acquire
+    game.bullets = [new(x, y, vy, dmg) for x, y, vy, dmg in zip(bx.tolist(), by.tolist(), bvy.tolist(),
+                                                                  bdmg.tolist())]
+    px, py, kinds = take("f8", npu), take("f8", npu), take("u1", npu)
+    new = game.powerup_pool.acquire
+    game.powerups = [new(x, y, POWERUP_KINDS[k]) for x, y, k in zip(px.tolist(), py.tolist(), kinds.tolist())]
+
+    en = game.enemies
+    while en.capacity < ne:
+        en._grow()
+    for name, dtype in en.FIELDS:
+        getattr(en, name)[:ne] = take(dtype, ne)
+    en.n = ne
+    en.order = take("i8", ne).astype(np.intp)
+
+    pb = game.particles
+    if pb.capacity < npart:
+        grown = ParticleBuffer(capacity=npart, scale=pb.scale)
+        grown.density = pb.density; grown.rng = pb.rng
+        game.particles = pb = grown
+    cols = [(pb.x, "f4"), (pb.y, "f4"), (pb.vx, "f4"), (pb.vy, "f4"), (pb.life, "i2"), (pb.size, "u1"),
+            (pb.color, "u1")]
+    for arr, dtype in cols:
+        arr[:npart] = take(dtype, npart)
+    pb.n = npart
+    palette = take("u1", ncol * 3).reshape(ncol, 3).tolist()
+    pb.palette = [tuple(c) for c in palette]
+    pb._color_ids = {c: i for i, c in enumerate(pb.palette)}
+    pb._sprites = [None] * len(pb._sprites)
+    return game
+
+class SnapshotWriter:
+    """Writes snapshots to `path` on a background thread: <path>.tmp, fsync,
+    rename over <path>. Only the newest pending snapshot is written."""
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue(maxsize=1)
+        self.thread = None
+        self.written = 0
+
+    def save(self, data):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, name="snapshot-writer", daemon=True)
+            self.thread.start()
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            # the writer is behind: replace the pending snapshot with this one
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(data)
+
+    def discard(self):
+        """The run ended: drop pending saves and the file (writes are ordered)."""
+        self.save(b"")
+
+    def close(self, timeout=2.0):
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _writer(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            try:
+                if not data:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                    continue
+                tmp = self.path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                self.written += 1
+            except OSError as e:
+                print("Snapshot write failed:", e)
+
+# ---------------- command line ----------------
+def make_fixture(sky, enemies=1000, bullets=500, powerups=20, particles=4000, difficulty="Hard", seed=1):
+    """A Game crowded with entities, spread over the play area."""
+    rng = np.random.default_rng(seed)
+    g = sky.Game(sky.TickClock(), seed=seed)
+    g.save_scores = False
+    g.set_difficulty(difficulty, seed=seed)
+    g.particles = sky.ParticleBuffer(capacity=max(4096, particles), scale=sky.WIDTH/480)
+    g.particles.rng = np.random.default_rng(seed)
+    en = g.enemies
+    for i in range(enemies):
+        j = en.spawn(1 + i % 8, "boss" if i % 50 == 0 else "normal", g.enemy_hp_mul, g.enemy_speed_mul)
+        en.z[j] = rng.uniform(120, en.base_z[j])
+        en.speed[j] = 0.05
+    en.project()
+    en.px[:en.n] = en.x[:en.n]; en.py[:en.n] = en.y[:en.n]
+    en.order = en.order[np.argsort(-en.z[en.order], kind="stable")]
+    for x, y in zip(rng.uniform(0, sky.WIDTH, bullets).tolist(), rng.uniform(0, sky.PLAY_H, bullets).tolist()):
+        g.bullets.append(g.bullet_pool.acquire(x, y, -14, 1))
+    for x, y in zip(rng.uniform(0, sky.WIDTH, powerups).tolist(), rng.uniform(0, sky.PLAY_H, powerups).tolist()):
+        g.powerups.append(g.powerup_pool.acquire(x, y, "hp" if rng.random() < 0.5 else "multi"))
+    while len(g.particles) < particles:
+        g.particles.emit(rng.uniform(0, sky.WIDTH), rng.uniform(0, sky.PLAY_H), sky.YELLOW,
+                         min(40, particles - len(g.particles)), 30, 30)
+    return g
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect run snapshots or write benchmark fixtures")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    info = sub.add_parser("info", help="print a snapshot's header and entity counts")
+    info.add_argument("path")
+    fx = sub.add_parser("fixture", help="write a snapshot crowded with entities")
+    fx.add_argument("path")
+    fx.add_argument("--size", default="480x800")
+    fx.add_argument("--enemies", type=int, default=1000)
+    fx.add_argument("--bullets", type=int, default=500)
+    fx.add_argument("--powerups", type=int, default=20)
+    fx.add_argument("--particles", type=int, default=4000)
+    fx.add_argument("--difficulty", default="Hard")
+    fx.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        data = read(args.path)
+        hd = header(data)
+        counts = COUNTS.unpack_from(data, HEADER.size + PLAYER.size + RNG.size)
+        for k, v in hd.items():
+            print(f"{k:>18}: {v}")
+        print(f"{'entities':>18}: bullets {counts[0]}  powerups {counts[1]}  enemies {counts[2]}  "
+              f"particles {counts[3]}  ({len(data)} bytes)")
+        return
+
+    from headless import load_game
+    w, h = (int(v) for v in args.size.split("x"))
+    sky = load_game((w, h))
+    g = make_fixture(sky, args.enemies, args.bullets, args.powerups, args.particles, args.difficulty, args.seed)
+    data = dumps(g, sky.WIDTH, sky.HEIGHT)
+    tmp = args.path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, args.path)
+    print(f"{args.path}: {len(data)} bytes, {g.counts()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# spatial_hash.py
+# Uniform-grid broad phase for the collision checks in Game.update.
+#
+# Items are inserted with an integer AABB (left, top, right, bottom) and land
+# in every cell they overlap. query() returns the set of item ids whose cells
+# overlap the given box; callers still do the exact rect test on those.
+
+class SpatialHash:
+    def __init__(self, cell=64):
+        self.cell = max(1, int(cell))
+        self.cells = {}
+        self.boxes = {}
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def insert(self, item, left, top, right, bottom):
+        """Add `item` (any hashable id) covering [left,right) x [top,bottom)."""
+        c = self.cell
+        self.boxes[item] = (left, top, right, bottom)
+        cells = self.cells
+        for cy in range(top // c, (bottom - 1) // c + 1):
+            for cx in range(left // c, (right - 1) // c + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [item]
+                else:
+                    bucket.append(item)
+
+    def query(self, left, top, right, bottom):
+        """Ids of items whose cells touch the box (a superset of real hits)."""
+        c = self.cell
+        cells = self.cells
+        found = set()
+        for cy in range(top // c, (bottom - 1) // c + 1):
+            for cx in range(left // c, (right - 1) // c + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def hits(self, left, top, right, bottom):
+        """Ids whose box really overlaps the given one, in ascending order.
+
+        Same test as pygame.Rect.colliderect for non-empty rects.
+        """
+        boxes = self.boxes
+        out = []
+        for item in self.query(left, top, right, bottom):
+            l, t, r, b = boxes[item]
+            if left < r and l < right and top < b and t < bottom:
+                out.append(item)
+        out.sort()
+        return out
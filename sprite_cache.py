@@ -0,0 +1,102 @@
+# sprite_cache.py
+# LRU cache of pre-scaled sprites keyed by (name, quantized width, height).
+#
+# Enemies shrink/grow every frame as their z changes; smoothscaling the source
+# image each time is the biggest per-enemy draw cost. Sizes are snapped to a
+# `quantum` pixel grid so nearby sizes share one scaled surface.
+
+from collections import OrderedDict
+import pygame
+
+class SpriteCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024, quantum=4, smooth=True):
+        self.max_bytes = max_bytes
+        self.quantum = max(1, int(quantum))
+        self.smooth = smooth
+        self.entries = OrderedDict()   # key -> Surface, oldest first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, v):
+        q = self.quantum
+        return max(q, int((v + q // 2) // q * q))
+
+    def _scale(self, img, w, h):
+        if self.smooth:
+            return pygame.transform.smoothscale(img, (w, h))
+        return pygame.transform.scale(img, (w, h))
+
+    def get(self, name, img, w, h=None, aspect=None):
+        """Scaled copy of `img` about w x h (h defaults to w*aspect, min 12)."""
+        w = self.quantize(w)
+        if h is None:
+            h = max(12, int(w * (aspect or 1.0)))
+        key = (name, w, h)
+        entries = self.entries
+        surf = entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = self._scale(img, w, h)
+        self._put(key, surf)
+        return surf
+
+    def _put(self, key, surf):
+        self.entries[key] = surf
+        self.bytes += surf.get_width() * surf.get_height() * surf.get_bytesize()
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+            self.evictions += 1
+
+    def prebuild(self, name, img, lo, hi, aspect=None):
+        """Fill the cache for widths lo..hi so play never misses (no stats counted)."""
+        for w in range(self.quantize(lo), self.quantize(hi) + 1, self.quantum):
+            h = max(12, int(w * (aspect or 1.0)))
+            if (name, w, h) not in self.entries:
+                self._put((name, w, h), self._scale(img, w, h))
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+class TextCache:
+    """LRU of rendered text surfaces keyed by (font, text, color)."""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        entries = self.entries
+        surf = entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        entries[key] = surf
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.entries.clear()
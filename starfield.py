@@ -0,0 +1,70 @@
+# starfield.py
+# Procedural starfield pre-rendered into one tile per depth layer.
+#
+# Each layer is a screen-sized surface rendered once; drawing is one blit per
+# layer, or two while it wraps. The back layer is opaque and replaces the
+# background fill; the nearer ones are colorkeyed and scroll faster.
+
+import pygame
+
+# (share of the stars, scroll px/s, color) from far to near
+LAYERS = (
+    (0.40, 30, (90, 90, 130)),
+    (0.35, 60, (160, 160, 200)),
+    (0.25, 95, (220, 220, 250)),
+)
+KEY = (255, 0, 255)
+
+class Starfield:
+    def __init__(self, size, play_h, count=60, bg=(6, 10, 20)):
+        self.w, self.h = size
+        self.play_h = play_h
+        self.bg = bg
+        self.layers = []   # (tile, speed, [(x, y), ...])
+        si = 0
+        for li, (share, speed, color) in enumerate(LAYERS):
+            n = int(round(count * share))
+            stars = [(1 + (i*73) % (self.w - 2), (i*37) % play_h) for i in range(si, si + n)]
+            si += n
+            tile = pygame.Surface(size).convert()
+            if li == 0:
+                tile.fill(bg)
+            else:
+                tile.fill(KEY)
+                tile.set_colorkey(KEY, pygame.RLEACCEL)
+            for x, y in stars:
+                pygame.draw.circle(tile, color, (x, y), 1)
+            self.layers.append((tile, speed, color, stars))
+
+    def offset(self, speed, t):
+        return int(t * speed) % self.w
+
+    def draw(self, surf, t):
+        """Whole background: one or two blits per layer."""
+        for tile, speed, _, _ in self.layers:
+            off = self.offset(speed, t)
+            surf.blit(tile, (off, 0))
+            if off:
+                surf.blit(tile, (off - self.w, 0))
+
+    def _placements(self, t):
+        # (tile, screen x, tile x, y) for each star copy visible from the two wrap blits
+        w = self.w
+        for tile, speed, _, stars in self.layers:
+            off = self.offset(speed, t)
+            for x, y in stars:
+                if x - 1 + off < w:
+                    yield tile, x + off, x, y
+                if x + 2 + off > w:
+                    yield tile, x + off - w, x, y
+
+    def rects(self, t):
+        """Screen rects covered by the stars at time t (dirty-rect mode)."""
+        return [pygame.Rect(sx - 1, y - 1, 3, 3) for _, sx, _, y in self._placements(t)]
+
+    def draw_points(self, surf, t):
+        """Just the stars, copied from the tiles one by one; returns their rects."""
+        rects = []
+        for tile, sx, x, y in self._placements(t):
+            rects.append(surf.blit(tile, (sx - 1, y - 1), (x - 1, y - 1, 3, 3)))
+        return rects